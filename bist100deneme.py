@@ -1,14 +1,68 @@
 import streamlit as st
-import yfinance as yf
 import pandas as pd
-import pandas_ta as ta
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+import numpy as np
 from datetime import datetime
+import glob
+import importlib.util
 import json
-import requests
-from bs4 import BeautifulSoup
+import os
+import pickle
+import re
+import shutil
+import sqlite3
+import sys
 import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import bist_risk
+import bist_veri
+from bist_ekran import EKRAN_KOLONLARI, GOSTERGE_KOLONLARI, HAZIR_EKRANLAR, ekran_sql
+
+BASLANGIC = time.perf_counter()
+
+# --- TEMBEL İMPORT ---
+# Ağır modüller (yfinance, pandas_ta, plotly, requests, bs4) yalnızca onları
+# kullanan kod yolu çalıştığında yüklenir. BIST_TEMBEL_IMPORT=0 ile kapatılır.
+TEMBEL_IMPORT = os.environ.get("BIST_TEMBEL_IMPORT", "1") != "0"
+AGIR_MODULLER = ("yfinance", "pandas_ta", "plotly.graph_objects", "plotly.subplots", "requests", "bs4")
+
+@st.cache_resource
+def baslangic_olcumleri():
+    """Süreç geneli açılış ölçümleri: import süreleri, ısıtma ve ilk çizim"""
+    return {'importlar': {}, 'isitma': {}, 'ilk_cizim': None, 'son_calisma': None}
+
+def modul_yukle(ad):
+    """Modülü ilk kullanımda içe aktar ve import süresini kaydet"""
+    if ad in sys.modules:
+        return importlib.import_module(ad)
+    t0 = time.perf_counter()
+    modul = importlib.import_module(ad)
+    baslangic_olcumleri()['importlar'].setdefault(ad, time.perf_counter() - t0)
+    return modul
+
+class TembelModul:
+    """Öznitelik erişiminde asıl modülü yükleyen vekil"""
+    def __init__(self, ad):
+        self._ad = ad
+    
+    def __getattr__(self, oznitelik):
+        return getattr(modul_yukle(self._ad), oznitelik)
+
+yf = TembelModul("yfinance")
+go = TembelModul("plotly.graph_objects")
+requests = TembelModul("requests")
+
+def make_subplots(*args, **kwargs):
+    return modul_yukle("plotly.subplots").make_subplots(*args, **kwargs)
+
+def BeautifulSoup(*args, **kwargs):
+    return modul_yukle("bs4").BeautifulSoup(*args, **kwargs)
+
+if not TEMBEL_IMPORT:
+    for _modul in AGIR_MODULLER:
+        modul_yukle(_modul)
 
 # --- SAYFA AYARLARI ---
 st.set_page_config(page_title="BIST100 PRO", layout="wide", page_icon="📈")
@@ -105,11 +159,21 @@ if 'data' not in st.session_state:
     st.session_state['data'] = None
 if 'last_alerts' not in st.session_state:
     st.session_state['last_alerts'] = {}
+if 'tarama_farki' not in st.session_state:
+    st.session_state['tarama_farki'] = None
+if 'gosterge_paneli' not in st.session_state:
+    st.session_state['gosterge_paneli'] = None
 if 'data_source' not in st.session_state:
     st.session_state['data_source'] = 'yahoo'
 
 # --- HYBRID VERİ ÇEKME SİSTEMİ ---
 
+# Çalıştırma başına veri modu (her yeniden çalıştırmada sıfırlanır)
+veri_ayarlari = {
+    'replay': None,  # {'veriler': {sembol: df}, 'saat': Timestamp, 'onbellek': indikator LRU} -> yerel simüle besleme
+    'hedge': False,  # kaynaklar arası paralel yedek istek (hedged fetch)
+}
+
 def fetch_from_yahoo(symbol, period="1y", interval="1d"):
     """Yahoo Finance'den veri çek (Birincil kaynak)"""
     try:
@@ -175,31 +239,482 @@ def fetch_from_rapidapi(symbol_name):
     except:
         return None, None
 
+def fetch_from_replay(symbol, period="1y", interval="1d"):
+    """Replay modu: depolanmış günlük barları simüle saate kadar döndür (yerel kaynak)"""
+    besleme = veri_ayarlari['replay']
+    df = besleme['veriler'].get(symbol)
+    if df is None or interval != "1d":
+        return None, None
+    df = df.loc[:besleme['saat']]
+    if len(df) >= 50:
+        return df, "replay"
+    return None, None
+
+# Kaynak sırası; hepsi (symbol, period, interval) imzasıyla çağrılır
+VERI_KAYNAKLARI = (
+    ("yahoo", fetch_from_yahoo),
+    ("investing", lambda symbol, period, interval: fetch_from_investing(symbol)),
+    ("rapidapi", lambda symbol, period, interval: fetch_from_rapidapi(symbol)),
+)
+
 def hybrid_data_fetch(symbol, period="1y", interval="1d"):
     """
     Hybrid veri çekme sistemi:
+    0. Replay modu açıksa yalnızca yerel simüle besleme
     1. Önce Yahoo Finance dene
     2. Başarısız olursa Investing.com dene
     3. O da olmazsa RapidAPI dene
+    Hedge modunda sıralı deneme yerine hedged_data_fetch kullanılır.
+    Aynı (sembol, periyot, aralık) için eşzamanlı çağrılar tek upstream çağrısını paylaşır.
     """
-    # 1. Yahoo Finance (En hızlı ve güvenilir)
-    df, source = fetch_from_yahoo(symbol, period, interval)
-    if df is not None:
-        return df, source
+    if veri_ayarlari['replay'] is not None:
+        return fetch_from_replay(symbol, period, interval)
+    hedge = veri_ayarlari['hedge']
+    return tek_ucus((symbol, period, interval), lambda: kaynaklardan_cek(symbol, period, interval, hedge))
+
+def kaynaklardan_cek(symbol, period, interval, hedge=False):
+    """Upstream çağrısı: hedged ya da kaynak sırasıyla"""
+    if hedge:
+        return hedged_data_fetch(symbol, period, interval)
     
-    # 2. Investing.com (Yedek)
-    time.sleep(0.5)  # Rate limiting
-    df, source = fetch_from_investing(symbol)
-    if df is not None:
-        return df, source
+    for i, (ad, kaynak) in enumerate(VERI_KAYNAKLARI):
+        if i > 0:
+            time.sleep(0.5)  # Rate limiting
+        df, source = kaynak_cagir(ad, kaynak, symbol, period, interval)
+        if df is not None:
+            return df, source
+    
+    return None, None
+
+# --- TEK UÇUŞ (SINGLE-FLIGHT) ---
+@st.cache_resource
+def ucustaki_istekler():
+    """Anahtar -> devam eden upstream çağrısı; tüm oturumlarca paylaşılır"""
+    return bist_veri.ucus_durumu()
+
+def tek_ucus(anahtar, fonksiyon):
+    """Aynı anahtarla eşzamanlı çağrılar tek upstream çağrısını paylaşır (bkz. bist_veri.tek_ucus)"""
+    return bist_veri.tek_ucus(ucustaki_istekler(), anahtar, fonksiyon)
+
+# --- HEDGED VERİ ÇEKME ---
+# Gecikme istatistikleri ve hedged istek bist_veri modülündedir; burada süreç geneli
+# paylaşılan depo ve havuz bağlanır.
+
+@st.cache_resource
+def kaynak_gecikmeleri():
+    """Kaynak başına son gecikmeler ve başarılar; hedge eşiklerini ve sağlık durumunu besler"""
+    return bist_veri.gecikme_deposu()
+
+@st.cache_resource
+def hedge_havuzu():
+    """Hedged isteklerin iş parçacığı havuzu (kaybeden istekler burada sonlanır)"""
+    return ThreadPoolExecutor(max_workers=16, thread_name_prefix="hedge")
+
+def kaynak_cagir(ad, kaynak, symbol, period, interval):
+    """Kaynağı çağır; gecikme ve başarıyı paylaşılan histograma kaydet"""
+    return bist_veri.kaynak_cagir(kaynak_gecikmeleri(), ad, kaynak, symbol, period, interval)
+
+def hedged_data_fetch(symbol, period="1y", interval="1d"):
+    """Hedged veri çekme: birincil kaynak p95'i aşınca sıradaki sağlıklı kaynağa paralel istek"""
+    return bist_veri.hedged_fetch(kaynak_gecikmeleri(), hedge_havuzu(), VERI_KAYNAKLARI, symbol, period, interval)
+
+def gecikme_histogrami():
+    """Kaynak başına gecikme kovası sayıları ve p50/p95"""
+    return bist_veri.gecikme_histogrami(kaynak_gecikmeleri())
+
+# --- FİYAT ÖNBELLEĞİ ---
+FIYAT_TTL = 300  # saniye
+FIYAT_ONBELLEK_LIMIT = 1000  # kayıt; en uzun süredir kullanılmayan düşer
+
+@st.cache_resource
+def fiyat_deposu():
+    """(sembol, periyot, aralık) -> (df, kaynak, zaman) LRU; tüm oturumlarca paylaşılır"""
+    return {'kilit': threading.Lock(), 'veri': OrderedDict()}
+
+def fiyat_kaydi(anahtar):
+    depo = fiyat_deposu()
+    with depo['kilit']:
+        kayit = depo['veri'].get(anahtar)
+        if kayit is not None:
+            depo['veri'].move_to_end(anahtar)
+    return kayit
+
+def fiyat_kaydet(anahtar, kayit, uzerine_yaz=True):
+    depo = fiyat_deposu()
+    with depo['kilit']:
+        if uzerine_yaz or anahtar not in depo['veri']:
+            depo['veri'][anahtar] = kayit
+        depo['veri'].move_to_end(anahtar)
+        while len(depo['veri']) > FIYAT_ONBELLEK_LIMIT:
+            depo['veri'].popitem(last=False)
+
+def fiyat_kayitlari():
+    """Önbellekteki kayıtların anlık kopyası: [(anahtar, (df, kaynak, zaman))]"""
+    depo = fiyat_deposu()
+    with depo['kilit']:
+        return list(depo['veri'].items())
+
+def fiyat_gecmisi(symbol, period="1y", interval="1d"):
+    """
+    Önbellekli fiyat geçmişi. Dönen çerçeve tarama, grafik ve indikatörler
+    arasında paylaşılır; üzerinde değişiklik yapılmamalıdır.
+    """
+    if veri_ayarlari['replay'] is not None:
+        # Simüle barlar paylaşılan önbelleğe yazılmaz
+        return hybrid_data_fetch(symbol, period=period, interval=interval)
+    
+    anahtar = (symbol, period, interval)
+    kayit = fiyat_kaydi(anahtar)
+    if kayit is not None and time.time() - kayit[2] < FIYAT_TTL:
+        return kayit[0], kayit[1]
     
-    # 3. RapidAPI (Son çare)
-    time.sleep(0.5)
-    df, source = fetch_from_rapidapi(symbol)
+    df, source = hybrid_data_fetch(symbol, period=period, interval=interval)
     if df is not None:
-        return df, source
+        fiyat_kaydet(anahtar, (df, source, time.time()))
+        onbellege_yaz(anahtar, df, source)
+    return df, source
+
+# Fiyat önbelleği diske de yazılır; sunucu açılışında belleğe geri yüklenir
+ONBELLEK_DIZINI = os.environ.get(
+    "BIST_ONBELLEK_DIZINI",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".bist_onbellek")
+)
+ONBELLEK_MAX_YAS = 12 * 3600  # açılışta bundan eski disk kayıtları yüklenmez
+
+def onbellege_yaz(anahtar, df, source):
+    """Fiyat çerçevesini disk önbelleğine yaz"""
+    try:
+        os.makedirs(ONBELLEK_DIZINI, exist_ok=True)
+        dosya = os.path.join(ONBELLEK_DIZINI, "__".join(anahtar) + ".pkl")
+        with open(dosya, "wb") as f:
+            pickle.dump({'anahtar': anahtar, 'df': df, 'kaynak': source}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    except Exception:
+        pass
+
+# --- İNDİKATÖR KAYIT DEFTERİ ---
+# Her indikatör girdilerini, varsayılan parametrelerini ve gereken minimum
+# bar sayısını bildirir. Hesaplama ilk istekte yapılır ve paylaşılır.
+INDIKATORLER = {
+    "RSI": {
+        'girdiler': ('Close',), 'parametreler': {'length': 14},
+        'min_bar': lambda p: p['length'] + 1,
+        'hesapla': lambda df, length: df.ta.rsi(length=length, talib=False),
+        'hizli': lambda ck, x, length: {f"RSI_{length}": ck['rsi'](x['Close'], length)}, 'seri': True,
+    },
+    "MACD": {
+        'girdiler': ('Close',), 'parametreler': {'fast': 12, 'slow': 26, 'signal': 9},
+        'min_bar': lambda p: p['slow'] + p['signal'],
+        'hesapla': lambda df, fast, slow, signal: df.ta.macd(fast=fast, slow=slow, signal=signal, talib=False),
+        'hizli': lambda ck, x, fast, slow, signal: dict(zip(
+            (f"MACD_{fast}_{slow}_{signal}", f"MACDh_{fast}_{slow}_{signal}", f"MACDs_{fast}_{slow}_{signal}"),
+            ck['macd'](x['Close'], fast, slow, signal))),
+    },
+    "SMA": {
+        'girdiler': ('Close',), 'parametreler': {'length': 50},
+        'min_bar': lambda p: p['length'],
+        'hesapla': lambda df, length: df.ta.sma(length=length, talib=False),
+    },
+    "ADX": {
+        'girdiler': ('High', 'Low', 'Close'), 'parametreler': {'length': 14},
+        'min_bar': lambda p: 2 * p['length'],
+        'hesapla': lambda df, length: df.ta.adx(length=length, talib=False),
+        'hizli': lambda ck, x, length: dict(zip(
+            (f"ADX_{length}", f"DMP_{length}", f"DMN_{length}"),
+            ck['adx'](x['High'], x['Low'], x['Close'], length))),
+    },
+    "ATR": {
+        'girdiler': ('High', 'Low', 'Close'), 'parametreler': {'length': 14},
+        'min_bar': lambda p: p['length'] + 1,
+        'hesapla': lambda df, length: df.ta.atr(length=length, talib=False),
+        'hizli': lambda ck, x, length: {f"ATRr_{length}": ck['atr'](x['High'], x['Low'], x['Close'], length)},
+        'seri': True,
+    },
+    "BBANDS": {
+        'girdiler': ('Close',), 'parametreler': {'length': 20, 'std': 2},
+        'min_bar': lambda p: p['length'],
+        'hesapla': lambda df, length, std: df.ta.bbands(length=length, std=std, talib=False),
+    },
+    "STOCH": {
+        'girdiler': ('High', 'Low', 'Close'), 'parametreler': {'k': 14, 'd': 3, 'smooth_k': 3},
+        'min_bar': lambda p: p['k'] + p['d'] + p['smooth_k'],
+        'hesapla': lambda df, k, d, smooth_k: df.ta.stoch(k=k, d=d, smooth_k=smooth_k, talib=False),
+        'hizli': lambda ck, x, k, d, smooth_k: dict(zip(
+            (f"STOCHk_{k}_{d}_{smooth_k}", f"STOCHd_{k}_{d}_{smooth_k}"),
+            ck['stoch'](x['High'], x['Low'], x['Close'], k, d, smooth_k))),
+    },
+    "OBV": {
+        'girdiler': ('Close', 'Volume'), 'parametreler': {},
+        'min_bar': lambda p: 2,
+        'hesapla': lambda df: df.ta.obv(talib=False),
+    },
+    "HACIM_SMA": {
+        'girdiler': ('Volume',), 'parametreler': {'length': 20},
+        'min_bar': lambda p: p['length'],
+        'hesapla': lambda df, length: df['Volume'].rolling(window=length).mean(),
+    },
+    "CDL_ENGULFING": {
+        'girdiler': ('Open', 'High', 'Low', 'Close'), 'parametreler': {},
+        'min_bar': lambda p: 2,
+        # TA-Lib kuralları pandas ile (TA-Lib kurulu olmasa da çekirdekle aynı sinyal)
+        'hesapla': lambda df: modul_yukle("bist_cekirdekler").yutan_formasyonu(df),
+        'hizli': lambda ck, x: {"CDL_ENGULFING": ck['yutan'](x['Open'], x['High'], x['Low'], x['Close'])},
+    },
+    "CDL_HAMMER": {
+        'girdiler': ('Open', 'High', 'Low', 'Close'), 'parametreler': {},
+        'min_bar': lambda p: 11,
+        'hesapla': lambda df: modul_yukle("bist_cekirdekler").cekic_formasyonu(df),
+        'hizli': lambda ck, x: {"CDL_HAMMER": ck['cekic'](x['Open'], x['High'], x['Low'], x['Close'])},
+    },
+}
+
+INDIKATOR_ONBELLEK_LIMIT = 5000
+
+@st.cache_resource
+def indikator_onbellegi():
+    """Hesaplanmış indikatörlerin LRU önbelleği (tarama, grafik ve diğer tüketiciler ortak)"""
+    return {'kilit': threading.Lock(), 'veri': OrderedDict()}
+
+def aktif_indikator_onbellegi():
+    """Replay sırasında replay'e özel önbellek (simüle barlar ortak önbellekten kayıt düşürmesin)"""
+    if veri_ayarlari['replay'] is not None:
+        return veri_ayarlari['replay']['onbellek']
+    return indikator_onbellegi()
+
+def veri_surumu(df):
+    """Fiyat çerçevesinin içeriğine bağlı sürüm etiketi"""
+    return (len(df), str(df.index[-1]), float(df['Close'].iloc[-1]))
+
+def indikator_al(ticker, interval, df, ad, **parametreler):
+    """
+    Kayıttaki indikatörü ilk istendiğinde hesapla ve
+    (ticker, aralık, ad, parametreler, veri sürümü) anahtarıyla sakla.
+    Yeterli geçmiş yoksa None döner.
+    """
+    tanim = INDIKATORLER[ad]
+    p = {**tanim['parametreler'], **parametreler}
+    if df is None or len(df) < tanim['min_bar'](p):
+        return None
     
-    return None, None
+    anahtar = indikator_anahtari(ticker, interval, df, ad, p)
+    onbellek = aktif_indikator_onbellegi()
+    with onbellek['kilit']:
+        if anahtar in onbellek['veri']:
+            onbellek['veri'].move_to_end(anahtar)
+            return onbellek['veri'][anahtar]
+    
+    try:
+        if 'hizli' in tanim and hizli_cekirdekler() is not None:
+            girdiler = {g: df[g].to_numpy(dtype=np.float64).reshape(-1, 1) for g in tanim['girdiler']}
+            ciktilar = hizli_hesapla(tanim, girdiler, p)
+            sonuc = hizli_cikti(tanim, {kolon: dizi[:, 0] for kolon, dizi in ciktilar.items()}, df.index)
+        else:
+            modul_yukle("pandas_ta")  # df.ta erişimcisini kaydeder
+            sonuc = tanim['hesapla'](df[list(tanim['girdiler'])], **p)
+    except Exception:
+        sonuc = None
+    
+    onbellege_koy(anahtar, sonuc)
+    return sonuc
+
+def indikator_anahtari(ticker, interval, df, ad, p):
+    return (ticker, interval, ad, tuple(sorted(p.items())), veri_surumu(df))
+
+def onbellege_koy(anahtar, sonuc):
+    onbellek = aktif_indikator_onbellegi()
+    with onbellek['kilit']:
+        onbellek['veri'][anahtar] = sonuc
+        onbellek['veri'].move_to_end(anahtar)
+        while len(onbellek['veri']) > INDIKATOR_ONBELLEK_LIMIT:
+            onbellek['veri'].popitem(last=False)
+
+def _sutun(cerceve, onek):
+    """Çok kolonlu indikatör çıktısından öneki eşleşen kolonu seç"""
+    return cerceve[[col for col in cerceve.columns if col.startswith(onek)][0]]
+
+# --- HIZLANDIRILMIŞ ÇEKİRDEKLER ---
+# Yol bağımlı indikatörler (Wilder RMA ile RSI/ATR/ADX, EMA tabanlı MACD, stokastik
+# yumuşatma, yutan/çekiç formasyonları) için opsiyonel numba çekirdekleri bist_cekirdekler
+# modülündedir (testler betiği çalıştırmadan doğrular). Girdiler (bar x hisse) 2B dizilerdir,
+# hisse ekseni paralel döner. numba yoksa veya BIST_HIZLANDIRMA=0 ise kayıttaki pandas yolu kullanılır.
+HIZLANDIRMA = os.environ.get("BIST_HIZLANDIRMA", "1") != "0"
+
+@st.cache_resource
+def hizli_cekirdekler():
+    """numba kuruluysa çekirdekleri yükle (derlenmiş kod disk önbelleğinden gelir); değilse None"""
+    if not HIZLANDIRMA or importlib.util.find_spec("numba") is None:
+        return None
+    ck = modul_yukle("bist_cekirdekler")
+    # workqueue katmanı eşzamanlı paralel çağrıya dayanıklı değil;
+    # oturumlar ve ısıtma iş parçacığı çekirdekleri sırayla çalıştırır
+    return {'rsi': ck.rsi, 'atr': ck.atr, 'adx': ck.adx, 'macd': ck.macd, 'stoch': ck.stoch,
+            'yutan': ck.yutan, 'cekic': ck.cekic, 'kilit': threading.Lock()}
+
+def sentetik_cerceveler(adet=100, bar=250, tohum=42):
+    return modul_yukle("bist_cekirdekler").sentetik_cerceveler(adet, bar, tohum)
+
+def hizli_hesapla(tanim, girdiler, p):
+    """Kayıttaki çekirdeği (bar x hisse) girdilerle çalıştır -> {kolon: 2B dizi}"""
+    cekirdekler = hizli_cekirdekler()
+    with cekirdekler['kilit']:
+        return tanim['hizli'](cekirdekler, girdiler, **p)
+
+def hizli_cikti(tanim, kolonlar, index):
+    """Çekirdek çıktısını pandas_ta yoluyla aynı biçime (Series/DataFrame) getir"""
+    cerceve = pd.DataFrame(kolonlar, index=index)
+    return cerceve.iloc[:, 0] if tanim.get('seri') else cerceve
+
+def toplu_girdiler(cerceveler, kolonlar):
+    """Çerçeveleri sağa hizalı (bar x hisse) dizilere çevir; kısa geçmişlerin başı NaN"""
+    uzunluk = max(len(df) for df in cerceveler.values())
+    diziler = {}
+    for kolon in kolonlar:
+        dizi = np.full((uzunluk, len(cerceveler)), np.nan)
+        for j, df in enumerate(cerceveler.values()):
+            dizi[uzunluk - len(df):, j] = df[kolon].to_numpy(dtype=np.float64)
+        diziler[kolon] = dizi
+    return diziler
+
+def indikatorleri_toplu_hesapla(cerceveler, interval, istekler):
+    """
+    Hızlandırılabilir indikatörleri tüm hisseler için tek çekirdek çağrısıyla hesapla
+    ve indikator_al'ın okuyacağı önbelleğe yaz. numba yoksa hiçbir şey yapmaz.
+    """
+    istekler = [(ad, p) for ad, p in istekler if 'hizli' in INDIKATORLER[ad]]
+    if hizli_cekirdekler() is None or not cerceveler or not istekler:
+        return
+    diziler = toplu_girdiler(cerceveler, {g for ad, _ in istekler for g in INDIKATORLER[ad]['girdiler']})
+    uzunluk = next(iter(diziler.values())).shape[0]
+    for ad, parametreler in istekler:
+        tanim = INDIKATORLER[ad]
+        p = {**tanim['parametreler'], **parametreler}
+        try:
+            ciktilar = hizli_hesapla(tanim, diziler, p)
+        except Exception:
+            continue
+        for j, (symbol, df) in enumerate(cerceveler.items()):
+            bas = uzunluk - len(df)
+            onbellege_koy(indikator_anahtari(symbol, interval, df, ad, p),
+                          hizli_cikti(tanim, {kolon: dizi[bas:, j] for kolon, dizi in ciktilar.items()}, df.index))
+
+def cekirdekleri_derle():
+    """Çekirdekleri küçük sentetik girdiyle derle; ilk tarama JIT derlemesini beklemez"""
+    if hizli_cekirdekler() is None:
+        return
+    t0 = time.perf_counter()
+    cerceveler = sentetik_cerceveler(adet=2, bar=60)
+    for ad, tanim in INDIKATORLER.items():
+        if 'hizli' in tanim:
+            try:
+                hizli_hesapla(tanim, toplu_girdiler(cerceveler, tanim['girdiler']), tanim['parametreler'])
+            except Exception:
+                pass
+    baslangic_olcumleri()['isitma']['jit_derleme_sn'] = time.perf_counter() - t0
+
+def cekirdek_karsilastir(cerceveler):
+    """
+    Hızlandırılmış çekirdekler ile kayıttaki pandas yolunu gerçek veride karşılaştır: en büyük
+    mutlak fark, NaN konum uyumu, ilk çağrı ve tekrar süreleri (doğruluk testleri: tests/).
+    """
+    modul_yukle("pandas_ta")
+    satirlar = []
+    for ad, tanim in INDIKATORLER.items():
+        if 'hizli' not in tanim:
+            continue
+        p = dict(tanim['parametreler'])
+        
+        t0 = time.perf_counter()
+        referans = {symbol: tanim['hesapla'](df[list(tanim['girdiler'])], **p)
+                    for symbol, df in cerceveler.items()}
+        pandas_sn = time.perf_counter() - t0
+        
+        t0 = time.perf_counter()
+        diziler = toplu_girdiler(cerceveler, tanim['girdiler'])
+        hizli_hesapla(tanim, diziler, p)
+        ilk_sn = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        diziler = toplu_girdiler(cerceveler, tanim['girdiler'])
+        ciktilar = hizli_hesapla(tanim, diziler, p)
+        hizli_sn = time.perf_counter() - t0
+        
+        fark, nan_uyumu = 0.0, True
+        uzunluk = next(iter(diziler.values())).shape[0]
+        for j, (symbol, df) in enumerate(cerceveler.items()):
+            ref = referans[symbol]
+            if ref is None:
+                fark = None
+                break
+            ref = ref.to_frame() if isinstance(ref, pd.Series) else ref
+            for kolon, dizi in ciktilar.items():
+                a = ref[kolon].reindex(df.index).to_numpy(dtype=np.float64)  # pandas_ta bazı çıktıları ilk geçerli bardan başlatır
+                b = dizi[uzunluk - len(df):, j]
+                nan_uyumu &= bool(np.array_equal(np.isnan(a), np.isnan(b)))
+                if np.isfinite(a - b).any():
+                    fark = max(fark, float(np.nanmax(np.abs(a - b))))
+        
+        satirlar.append({
+            'İndikatör': ad,
+            'Maks. fark': f"{fark:.1e}" if fark is not None else "referans yok",
+            'NaN uyumu': nan_uyumu if fark is not None else None,
+            'pandas_ta (ms)': round(pandas_sn * 1000, 1),
+            'İlk çağrı/derleme (ms)': round(ilk_sn * 1000, 1),
+            'Çekirdek (ms)': round(hizli_sn * 1000, 1),
+            'Hızlanma': round(pandas_sn / hizli_sn, 1) if hizli_sn > 0 else None,
+        })
+    return pd.DataFrame(satirlar)
+
+# --- SICAK AÇILIŞ ---
+# Taramanın varsayılan parametrelerle istediği indikatörler
+ISITILACAK_INDIKATORLER = (("RSI", {}), ("MACD", {}), ("SMA", {'length': 50}), ("SMA", {'length': 200}),
+                           ("ADX", {}), ("ATR", {}), ("BBANDS", {}), ("STOCH", {}), ("OBV", {}),
+                           ("HACIM_SMA", {}))
+# Toplu (bar x hisse) çekirdek hesabına aday olanlar: ısıtılanlar + mum formasyonları
+TOPLU_INDIKATORLER = ISITILACAK_INDIKATORLER + (("CDL_ENGULFING", {}), ("CDL_HAMMER", {}))
+
+def indikatorleri_isit(kayitlar):
+    """Yüklenen günlük çerçeveler için varsayılan indikatörleri önceden hesapla"""
+    t0 = time.perf_counter()
+    indikatorleri_toplu_hesapla({symbol: df for (symbol, _, _), df in kayitlar}, "1d", TOPLU_INDIKATORLER)
+    for (symbol, period, interval), df in kayitlar:
+        for ad, parametreler in ISITILACAK_INDIKATORLER:
+            indikator_al(symbol, interval, df, ad, **parametreler)
+    olcum = baslangic_olcumleri()['isitma']
+    olcum['indikator_sn'] = time.perf_counter() - t0
+    olcum['indikator_hisse'] = len(kayitlar)
+
+@st.cache_resource
+def sicak_acilis():
+    """
+    Süreç başına bir kez: disk önbelleğindeki fiyatları belleğe yükle ve
+    JIT çekirdeklerini derleyip indikatörleri arka planda ısıt; ilk oturum ağ ve hesap beklemez.
+    """
+    t0 = time.perf_counter()
+    simdi = time.time()
+    gunlukler = []
+    for dosya in glob.glob(os.path.join(ONBELLEK_DIZINI, "*.pkl")):
+        try:
+            if simdi - os.path.getmtime(dosya) > ONBELLEK_MAX_YAS:
+                continue
+            with open(dosya, "rb") as f:
+                kayit = pickle.load(f)
+            # Açılışta yüklenen kayıtlar bir TTL süresince taze sayılır
+            fiyat_kaydet(kayit['anahtar'], (kayit['df'], kayit['kaynak'], simdi), uzerine_yaz=False)
+            if kayit['anahtar'][2] == "1d":
+                gunlukler.append((kayit['anahtar'], kayit['df']))
+        except Exception:
+            continue
+    
+    olcum = baslangic_olcumleri()['isitma']
+    olcum['fiyat_sn'] = time.perf_counter() - t0
+    olcum['fiyat_kayit'] = len(fiyat_deposu()['veri'])
+    
+    def arka_plan():
+        cekirdekleri_derle()
+        if gunlukler:
+            indikatorleri_isit(gunlukler)
+    threading.Thread(target=arka_plan, daemon=True).start()
+    return True
+
+sicak_acilis()
 
 # --- PİYASA VERİLERİ ---
 @st.cache_data(ttl=300)
@@ -253,49 +768,311 @@ def piyasa_verilerini_cek():
     except Exception as e:
         return None
 
+# --- KALICI VERİTABANI ---
+VERITABANI = os.environ.get(
+    "BIST_VERITABANI",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "bist100.db")
+)
+
+@st.cache_resource
+def veritabani():
+    """Paylaşılan SQLite bağlantısı ve yazma kilidi"""
+    baglanti = sqlite3.connect(VERITABANI, check_same_thread=False)
+    baglanti.execute("""
+        CREATE TABLE IF NOT EXISTS islemler (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            portfoy TEXT NOT NULL DEFAULT 'varsayilan',
+            hisse TEXT NOT NULL,
+            tur TEXT NOT NULL CHECK (tur IN ('AL', 'SAT')),
+            adet REAL NOT NULL,
+            fiyat REAL NOT NULL,
+            tarih TEXT NOT NULL
+        )
+    """)
+    # Portföy kolonu öncesi oluşturulmuş veritabanları: eski kayıtlar 'varsayilan' portföyüne düşer
+    if 'portfoy' not in {satir[1] for satir in baglanti.execute("PRAGMA table_info(islemler)")}:
+        baglanti.execute("ALTER TABLE islemler ADD COLUMN portfoy TEXT NOT NULL DEFAULT 'varsayilan'")
+    baglanti.execute("CREATE INDEX IF NOT EXISTS idx_islemler_portfoy_hisse_tarih ON islemler (portfoy, hisse, tarih)")
+    # Her taramanın hisse başına son indikatör değerleri (ekran sorguları için)
+    baglanti.execute("""
+        CREATE TABLE IF NOT EXISTS son_indikatorler (
+            hisse TEXT PRIMARY KEY,
+            sektor TEXT,
+            zaman TEXT NOT NULL,
+            fiyat REAL,
+            onceki_fiyat REAL,
+            rsi REAL,
+            macd REAL,
+            macd_sinyal REAL,
+            sma_50 REAL,
+            sma_200 REAL,
+            adx REAL,
+            atr REAL,
+            bb_alt REAL,
+            bb_orta REAL,
+            bb_ust REAL,
+            stoch_k REAL,
+            stoch_d REAL,
+            obv REAL,
+            hacim_orani REAL,
+            yutan REAL,
+            cekic REAL,
+            skor INTEGER,
+            karar TEXT
+        )
+    """)
+    for kolon in ("rsi", "adx", "skor", "karar", "sektor"):
+        baglanti.execute(f"CREATE INDEX IF NOT EXISTS idx_son_indikatorler_{kolon} ON son_indikatorler ({kolon})")
+    baglanti.commit()
+    return {'baglanti': baglanti, 'kilit': threading.Lock()}
+
+def db_calistir(sql, parametreler=()):
+    """Yazma sorgusu çalıştır ve kaydet"""
+    db = veritabani()
+    with db['kilit']:
+        db['baglanti'].execute(sql, parametreler)
+        db['baglanti'].commit()
+
+def db_coklu_calistir(sql, satirlar):
+    """Aynı yazma sorgusunu birçok satır için tek işlemde çalıştır"""
+    db = veritabani()
+    with db['kilit']:
+        db['baglanti'].executemany(sql, satirlar)
+        db['baglanti'].commit()
+
+def db_oku(sql, parametreler=()):
+    """Okuma sorgusunun sonucunu DataFrame olarak döndür"""
+    db = veritabani()
+    with db['kilit']:
+        return pd.read_sql_query(sql, db['baglanti'], params=parametreler)
+
 # --- PORTFÖY YÖNETİMİ ---
+# Defter portföy anahtarıyla ayrılır; anahtar URL'de (?portfoy=...) taşınır, yoksa 'varsayilan' açılır
+if 'portfoy_anahtari' not in st.session_state:
+    st.session_state['portfoy_anahtari'] = st.query_params.get("portfoy") or "varsayilan"
+aktif_portfoy = st.session_state['portfoy_anahtari'].strip() or "varsayilan"
+if st.query_params.get("portfoy") != aktif_portfoy:
+    st.query_params["portfoy"] = aktif_portfoy
+
+def islem_ekle(portfoy, hisse, tur, adet, fiyat, tarih=None):
+    """Portföyün işlem defterine alış/satış kaydı ekle"""
+    tarih = tarih or datetime.now().strftime("%Y-%m-%d %H:%M")
+    db_calistir("INSERT INTO islemler (portfoy, hisse, tur, adet, fiyat, tarih) VALUES (?, ?, ?, ?, ?, ?)",
+                (portfoy, hisse, tur, float(adet), float(fiyat), tarih))
+
+def portfoy_anahtarlari():
+    """Defterde kaydı olan portföy anahtarları"""
+    return db_oku("SELECT DISTINCT portfoy FROM islemler ORDER BY portfoy")['portfoy'].tolist()
+
+def pozisyonu_kapat(portfoy, hisse, adet, fiyat):
+    """Açık pozisyonu kapanış satışıyla kapat (geçmiş işlemler ve gerçekleşen K/Z korunur)"""
+    islem_ekle(portfoy, hisse, 'SAT', adet, fiyat)
+
+def defter_hesapla(portfoy):
+    """
+    Portföyün işlem defterini ortalama maliyet yöntemiyle işle. Her işleme gerçekleşen K/Z,
+    işlem sonrası kalan adet ve kalan maliyet kolonlarını ekler.
+    """
+    islemler = db_oku("SELECT id, hisse, tur, adet, fiyat, tarih FROM islemler WHERE portfoy = ? "
+                      "ORDER BY tarih, id", (portfoy,))
+    durum = {}  # hisse -> [adet, maliyet]
+    gerceklesen, kalan_adet, kalan_maliyet = [], [], []
+    
+    for hisse, tur, adet, fiyat in islemler[['hisse', 'tur', 'adet', 'fiyat']].itertuples(index=False):
+        pozisyon = durum.setdefault(hisse, [0.0, 0.0])
+        kar = 0.0
+        if tur == 'AL':
+            pozisyon[0] += adet
+            pozisyon[1] += adet * fiyat
+        else:
+            satilan = min(adet, pozisyon[0])
+            ortalama = pozisyon[1] / pozisyon[0] if pozisyon[0] > 0 else 0
+            kar = (fiyat - ortalama) * satilan
+            pozisyon[0] -= satilan
+            pozisyon[1] -= ortalama * satilan
+        gerceklesen.append(kar)
+        kalan_adet.append(pozisyon[0])
+        kalan_maliyet.append(pozisyon[1])
+    
+    islemler['gerceklesen'] = gerceklesen
+    islemler['kalan_adet'] = kalan_adet
+    islemler['kalan_maliyet'] = kalan_maliyet
+    islemler['gun'] = pd.to_datetime(islemler['tarih']).dt.normalize()
+    return islemler
+
+def satilabilir_adet(islemler, hisse, tarih):
+    """
+    Verilen tarihe eklenecek satışın en fazla adedi: o andaki pozisyon, sonraki işlemlerden
+    hiçbirini açığa düşürmeyecek şekilde (sonraki kalan adetlerin en küçüğüyle) sınırlanır.
+    """
+    grup = islemler[islemler['hisse'] == hisse]
+    once = grup[grup['tarih'] <= tarih]
+    sonra = grup[grup['tarih'] > tarih]
+    adet = once['kalan_adet'].iloc[-1] if len(once) else 0.0
+    if len(sonra):
+        adet = min(adet, sonra['kalan_adet'].min())
+    return max(adet, 0.0)
+
+def portfoy_pozisyonlari(islemler):
+    """Açık pozisyonlar: {hisse: {'adet', 'alis_fiyati', 'tarih'}}"""
+    pozisyonlar = {}
+    for hisse, grup in islemler.groupby('hisse', sort=False):
+        son = grup.iloc[-1]
+        if son['kalan_adet'] > 0:
+            pozisyonlar[hisse] = {
+                'adet': son['kalan_adet'],
+                'alis_fiyati': son['kalan_maliyet'] / son['kalan_adet'],
+                'tarih': son['tarih'],
+            }
+    return pozisyonlar
+
+@st.cache_data(ttl=300, show_spinner=False)
+def kapanis_paneli(semboller, period="1y"):
+    """Tek toplu istekle günlük kapanış paneli (tarih x sembol)"""
+    if not semboller:
+        return pd.DataFrame()
+    try:
+        df = yf.download(list(semboller), period=period, interval="1d", progress=False)
+        if df is None or df.empty:
+            return pd.DataFrame()
+        if isinstance(df.columns, pd.MultiIndex):
+            close = df['Close']
+        else:
+            close = df[['Close']].rename(columns={'Close': semboller[0]})
+        close.index = pd.DatetimeIndex(close.index).tz_localize(None).normalize()
+        return close.reindex(columns=list(semboller))
+    except Exception:
+        return pd.DataFrame()
+
+ENDEKS_SEMBOLU = "XU100.IS"
+ENDEKS = ENDEKS_SEMBOLU.replace(".IS", "")
+
+def portfoy_paneli(islemler):
+    """Defterdeki tüm hisselerin kapanış paneli (kolonlar .IS eksiz hisse kodu)"""
+    if islemler.empty:
+        return pd.DataFrame()
+    gecmis_gun = (pd.Timestamp.now() - islemler['gun'].min()).days
+    period = "1y" if gecmis_gun < 360 else "2y" if gecmis_gun < 720 else "5y" if gecmis_gun < 1800 else "max"
+    # Beta için endeks de aynı toplu istekte çekilir
+    semboller = tuple(sorted(f"{h}.IS" for h in islemler['hisse'].unique())) + (ENDEKS_SEMBOLU,)
+    panel = kapanis_paneli(semboller, period=period)
+    return panel.rename(columns=lambda c: c.replace(".IS", "")).ffill()
+
+def ozkaynak_egrisi(islemler, fiyatlar):
+    """
+    Günlük portföy değeri, maliyet ve K/Z eğrisi. Pozisyon ve maliyet
+    işlem günlerinden fiyat günlerine taşınıp panelle topluca çarpılır.
+    """
+    if islemler.empty or fiyatlar.empty:
+        return pd.DataFrame()
+    
+    gunler = fiyatlar.index
+    son_durum = islemler.groupby(['gun', 'hisse'])[['kalan_adet', 'kalan_maliyet']].last()
+    
+    def gunlere_tasi(cerceve):
+        return cerceve.reindex(cerceve.index.union(gunler)).ffill().reindex(gunler).fillna(0)
+    
+    adetler = gunlere_tasi(son_durum['kalan_adet'].unstack())
+    maliyetler = gunlere_tasi(son_durum['kalan_maliyet'].unstack())
+    gerceklesen = gunlere_tasi(islemler.groupby('gun')['gerceklesen'].sum().cumsum())
+    
+    fiyat = fiyatlar.reindex(columns=adetler.columns)
+    deger = (adetler * fiyat).sum(axis=1)
+    maliyet = maliyetler.sum(axis=1)
+    
+    egri = pd.DataFrame({
+        'Değer': deger,
+        'Maliyet': maliyet,
+        'Gerçekleşmemiş': deger - maliyet,
+        'Gerçekleşen': gerceklesen,
+    })
+    egri['Toplam K/Z'] = egri['Gerçekleşmemiş'] + egri['Gerçekleşen']
+    return egri
+
+def donem_kar_zarar(egri, islemler, baslangic, bitis):
+    """Tarih aralığı için gerçekleşen ve gerçekleşmemiş K/Z"""
+    baslangic, bitis = pd.Timestamp(baslangic), pd.Timestamp(bitis)
+    aralik = egri.loc[baslangic:bitis]
+    if aralik.empty:
+        return 0.0, 0.0, 0.0
+    gerceklesen = islemler.loc[islemler['gun'].between(baslangic, bitis), 'gerceklesen'].sum()
+    onceki = egri.loc[:baslangic - pd.Timedelta(days=1), 'Gerçekleşmemiş']
+    acilis = onceki.iloc[-1] if not onceki.empty else 0.0
+    gerceklesmemis = aralik['Gerçekleşmemiş'].iloc[-1]
+    return gerceklesen, gerceklesmemis, gerceklesen + gerceklesmemis - acilis
+
+# --- PORTFÖY RİSK ANALİZİ ---
+VAR_Z_95 = 1.6449  # tek taraflı %95 normal dağılım kantili
+
+# Artımlı kovaryans bist_risk modülündedir; durum süreç genelinde paylaşılır
+@st.cache_resource
+def kovaryans_durumu():
+    """Sembol kümesi -> artımlı kovaryans toplamları (LRU)"""
+    return bist_risk.kovaryans_durumu()
+
+def risk_analizi(pozisyonlar, fiyatlar):
+    """Korelasyon, endeks betası, tarihsel/parametrik VaR (%95, 1 gün) ve risk katkısı"""
+    hisseler = [h for h in pozisyonlar if h in fiyatlar.columns and not pd.isna(fiyatlar[h].iloc[-1])]
+    if not hisseler or ENDEKS not in fiyatlar.columns:
+        return None
+    
+    getiriler = fiyatlar[hisseler + [ENDEKS]].pct_change().iloc[1:].fillna(0)
+    if len(getiriler) < 20:
+        return None
+    
+    kov = bist_risk.artimli_kovaryans(kovaryans_durumu(), getiriler)
+    k = len(hisseler)
+    S = kov[:k, :k]
+    std = np.sqrt(np.diag(kov))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        korelasyon = kov[:k, :k] / np.outer(std[:k], std[:k])
+        beta = kov[:k, k] / kov[k, k]
+    
+    degerler = np.array([fiyatlar[h].iloc[-1] * pozisyonlar[h]['adet'] for h in hisseler])
+    toplam = degerler.sum()
+    w = degerler / toplam
+    
+    sigma_p = np.sqrt(w @ S @ w)
+    portfoy_getirisi = getiriler[hisseler].to_numpy() @ w
+    katki = w * (S @ w) / sigma_p ** 2 if sigma_p > 0 else np.zeros(k)
+    
+    return {
+        'korelasyon': pd.DataFrame(korelasyon, index=hisseler, columns=hisseler),
+        'tablo': pd.DataFrame({
+            'Ağırlık %': w * 100,
+            'Beta': beta,
+            'Yıllık Vol. %': std[:k] * np.sqrt(252) * 100,
+            'Risk Katkısı %': katki * 100,
+        }, index=hisseler),
+        'beta': float(w @ beta),
+        'volatilite': float(sigma_p * np.sqrt(252) * 100),
+        'parametrik_var': float(VAR_Z_95 * sigma_p * toplam),
+        'tarihsel_var': float(-np.percentile(portfoy_getirisi, 5) * toplam),
+    }
+
 def portfoy_hesapla():
-    """Portföy toplam değerini hesapla"""
+    """Portföy toplam değerini önbellekli kapanış panelinden hesapla"""
     toplam_deger = 0
     toplam_maliyet = 0
     
     for hisse, bilgi in st.session_state['portfolio'].items():
-        try:
-            ticker = f"{hisse}.IS"
-            df, _ = hybrid_data_fetch(ticker, period="1d", interval="1d")
-            
-            if df is not None and not df.empty:
-                guncel_fiyat = df['Close'].iloc[-1]
-                adet = bilgi['adet']
-                alis_fiyati = bilgi['alis_fiyati']
-                
-                toplam_deger += guncel_fiyat * adet
-                toplam_maliyet += alis_fiyati * adet
-        except:
-            continue
+        if hisse in portfoy_fiyatlari.columns and not pd.isna(portfoy_fiyatlari[hisse].iloc[-1]):
+            toplam_deger += portfoy_fiyatlari[hisse].iloc[-1] * bilgi['adet']
+            toplam_maliyet += bilgi['alis_fiyati'] * bilgi['adet']
     
     kar_zarar = toplam_deger - toplam_maliyet
     kar_zarar_pct = (kar_zarar / toplam_maliyet * 100) if toplam_maliyet > 0 else 0
     
     return toplam_deger, toplam_maliyet, kar_zarar, kar_zarar_pct
 
-def portfoy_ekle(hisse, adet, alis_fiyati):
-    """Portföye hisse ekle"""
-    if hisse in st.session_state['portfolio']:
-        mevcut = st.session_state['portfolio'][hisse]
-        toplam_adet = mevcut['adet'] + adet
-        ortalama_fiyat = ((mevcut['alis_fiyati'] * mevcut['adet']) + (alis_fiyati * adet)) / toplam_adet
-        st.session_state['portfolio'][hisse] = {
-            'adet': toplam_adet,
-            'alis_fiyati': ortalama_fiyat,
-            'tarih': datetime.now().strftime("%Y-%m-%d %H:%M")
-        }
-    else:
-        st.session_state['portfolio'][hisse] = {
-            'adet': adet,
-            'alis_fiyati': alis_fiyati,
-            'tarih': datetime.now().strftime("%Y-%m-%d %H:%M")
-        }
+def portfoy_ekle(hisse, adet, alis_fiyati, tarih=None):
+    """Portföye hisse ekle (deftere alış kaydı)"""
+    islem_ekle(aktif_portfoy, hisse, 'AL', adet, alis_fiyati, tarih=tarih)
+
+# Portföy her çalıştırmada kalıcı defterden türetilir
+islem_defteri = defter_hesapla(aktif_portfoy)
+st.session_state['portfolio'] = portfoy_pozisyonlari(islem_defteri)
+portfoy_fiyatlari = portfoy_paneli(islem_defteri)
 
 # --- YAN PANEL ---
 st.sidebar.header("📊 Piyasa Özeti")
@@ -339,10 +1116,23 @@ if piyasa_data:
 else:
     st.sidebar.warning("Veriler yükleniyor...")
 
+# Tarama sonrası piyasa genişliği (tarama bu çalıştırmada bitse de güncel olsun diye sonda doldurulur)
+genislik_alani = st.sidebar.container()
+
 st.sidebar.divider()
 
 # --- PORTFÖY BÖLÜMÜ ---
 st.sidebar.header("💼 Portföyüm")
+st.sidebar.text_input("👤 Portföy anahtarı", key='portfoy_anahtari',
+                      help="İşlem defteri bu anahtarla ayrılır ve adres çubuğunda (?portfoy=...) saklanır; "
+                           "aynı portföye dönmek için bu adresi kullanın. Anahtarsız adres ve önceki sürümde "
+                           "girilen işlemler 'varsayilan' portföyündedir.")
+try:
+    kayitli_portfoyler = portfoy_anahtarlari()
+    if kayitli_portfoyler:
+        st.sidebar.caption("Kayıtlı portföyler: " + ", ".join(kayitli_portfoyler))
+except Exception:
+    pass
 
 if st.session_state['portfolio']:
     try:
@@ -361,11 +1151,8 @@ if st.session_state['portfolio']:
         with st.sidebar.expander("📋 Portföy Detayları", expanded=False):
             for hisse, bilgi in st.session_state['portfolio'].items():
                 try:
-                    ticker = f"{hisse}.IS"
-                    df, _ = hybrid_data_fetch(ticker, period="1d", interval="1d")
-                    
-                    if df is not None and not df.empty:
-                        guncel = df['Close'].iloc[-1]
+                    if hisse in portfoy_fiyatlari.columns and not pd.isna(portfoy_fiyatlari[hisse].iloc[-1]):
+                        guncel = portfoy_fiyatlari[hisse].iloc[-1]
                         adet = bilgi['adet']
                         alis = bilgi['alis_fiyati']
                         kar = (guncel - alis) * adet
@@ -373,21 +1160,81 @@ if st.session_state['portfolio']:
                         
                         st.markdown(f"""
                         **{hisse}**  
-                        🔵 {adet} adet × {guncel:.2f} ₺  
+                        🔵 {adet:g} adet × {guncel:.2f} ₺  
                         💰 K/Z: {kar:,.2f} ₺ ({kar_pct:+.2f}%)
                         """)
                         
-                        if st.button(f"❌ {hisse} Sil", key=f"del_{hisse}", use_container_width=True):
-                            del st.session_state['portfolio'][hisse]
+                        if st.button(f"🔒 {hisse} Pozisyonu Kapat", key=f"kapat_{hisse}", use_container_width=True,
+                                     help="Kalan adedi son kapanıştan satış olarak kaydeder"):
+                            pozisyonu_kapat(aktif_portfoy, hisse, adet, guncel)
                             st.rerun()
                         st.divider()
                 except:
                     continue
+        
+        with st.sidebar.expander("📤 Satış Kaydet", expanded=False):
+            satis_hisse = st.selectbox("Hisse:", list(st.session_state['portfolio'].keys()), key="sell_stock")
+            satis_bilgi = st.session_state['portfolio'][satis_hisse]
+            satis_adet = st.number_input("Adet:", min_value=1.0, max_value=float(satis_bilgi['adet']),
+                                         value=float(satis_bilgi['adet']), step=1.0, key="sell_amount")
+            son_fiyat = (portfoy_fiyatlari[satis_hisse].iloc[-1]
+                         if satis_hisse in portfoy_fiyatlari.columns else satis_bilgi['alis_fiyati'])
+            satis_fiyati = st.number_input("Satış Fiyatı:", value=float(son_fiyat), format="%.2f", key="sell_price")
+            satis_tarihi = st.date_input("Tarih:", value=datetime.now().date(),
+                                         max_value=datetime.now().date(), key="sell_date")
+            if st.button("📤 SAT", use_container_width=True):
+                tarih = f"{satis_tarihi:%Y-%m-%d} {datetime.now():%H:%M}"
+                satilabilir = satilabilir_adet(islem_defteri, satis_hisse, tarih)
+                if satis_adet > satilabilir:
+                    st.error(f"{satis_tarihi:%d.%m.%Y} tarihinde {satis_hisse} için en fazla "
+                             f"{satilabilir:g} adet satılabilir.")
+                else:
+                    islem_ekle(aktif_portfoy, satis_hisse, 'SAT', satis_adet, satis_fiyati, tarih=tarih)
+                    st.rerun()
     except Exception as e:
         st.sidebar.error("Portföy hesaplanamadı")
 else:
     st.sidebar.info("Portföyünüz boş. Analiz sonuçlarından hisse ekleyin.")
 
+if st.session_state['portfolio']:
+    with st.sidebar.expander("⚠️ Risk Analizi", expanded=False):
+        risk = risk_analizi(st.session_state['portfolio'], portfoy_fiyatlari)
+        if risk is None:
+            st.caption("Risk analizi için yeterli fiyat geçmişi yok.")
+        else:
+            st.markdown(f"""
+            📉 VaR %95 (1g, tarihsel): **{risk['tarihsel_var']:,.2f} ₺**  
+            📐 VaR %95 (1g, parametrik): **{risk['parametrik_var']:,.2f} ₺**  
+            🧭 Beta ({ENDEKS}): **{risk['beta']:.2f}** | Yıllık Vol.: **%{risk['volatilite']:.1f}**
+            """)
+            st.dataframe(risk['tablo'].round(2), use_container_width=True)
+            st.caption("Korelasyon Matrisi")
+            st.dataframe(risk['korelasyon'].round(2), use_container_width=True)
+
+if not islem_defteri.empty:
+    with st.sidebar.expander("📈 Getiri Eğrisi & K/Z", expanded=False):
+        egri = ozkaynak_egrisi(islem_defteri, portfoy_fiyatlari)
+        if not egri.empty:
+            ilk_gun = max(egri.index[0], islem_defteri['gun'].min()).date()
+            aralik = st.date_input("Dönem:", value=(ilk_gun, egri.index[-1].date()),
+                                   min_value=egri.index[0].date(), max_value=egri.index[-1].date(),
+                                   key="equity_range")
+            if isinstance(aralik, (tuple, list)) and len(aralik) == 2:
+                baslangic, bitis = aralik
+                gerceklesen, gerceklesmemis, donem_kz = donem_kar_zarar(egri, islem_defteri, baslangic, bitis)
+                st.line_chart(egri.loc[pd.Timestamp(baslangic):pd.Timestamp(bitis), ['Değer', 'Maliyet']], height=200)
+                st.markdown(f"""
+                ✅ Gerçekleşen: **{gerceklesen:,.2f} ₺**  
+                ⏳ Gerçekleşmemiş: **{gerceklesmemis:,.2f} ₺**  
+                📊 Dönem K/Z: **{donem_kz:,.2f} ₺**
+                """)
+    
+    with st.sidebar.expander("🧾 İşlem Defteri", expanded=False):
+        st.dataframe(
+            islem_defteri[['tarih', 'hisse', 'tur', 'adet', 'fiyat', 'gerceklesen']].iloc[::-1],
+            hide_index=True, use_container_width=True
+        )
+
 st.sidebar.divider()
 
 # --- AYARLAR ---
@@ -413,30 +1260,127 @@ varsayilan_hisseler = [
     "YEOTK.IS", "YKBNK.IS", "YYLGD.IS", "ZOREN.IS"
 ]
 
+# --- HİSSE EVRENİ ---
+EVREN_DOSYASI = os.environ.get(
+    "BIST_EVREN_DOSYASI",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "bist_evren.csv")
+)
+
+@st.cache_data(ttl=3600)
+def evren_yukle(dosya=EVREN_DOSYASI):
+    """Hisse evrenini ve sektörlerini dosyadan yükle: {sembol: sektör} (dosya yoksa varsayılan BIST100 listesi)"""
+    try:
+        evren = pd.read_csv(dosya, comment="#", dtype=str).dropna(subset=['Hisse'])
+        kodlar = evren['Hisse'].str.strip().str.upper()
+        sektor = evren['Sektor'].fillna("Diğer") if 'Sektor' in evren.columns else ["Diğer"] * len(evren)
+        harita = {(k if k.endswith(".IS") else f"{k}.IS"): sek for k, sek in zip(kodlar, sektor) if k}
+        if harita:
+            return harita
+    except Exception:
+        pass
+    return {symbol: "Diğer" for symbol in varsayilan_hisseler}
+
+sektorler = evren_yukle()
+tum_hisseler = list(sektorler)
+
+if 'secilen_hisseler' not in st.session_state:
+    st.session_state['secilen_hisseler'] = tum_hisseler
+
 secilen_hisseler = st.sidebar.multiselect(
     "📊 Taranacak Hisseler", 
-    varsayilan_hisseler, 
-    default=varsayilan_hisseler,
-    help="BIST100'deki tüm hisseler (100 adet)"
+    tum_hisseler, 
+    key='secilen_hisseler',
+    help=f"Evren dosyasındaki tüm hisseler ({len(tum_hisseler)} adet)"
 )
 
+st.sidebar.markdown("**🔎 Ön Eleme (Faz 1)**")
+on_eleme_aktif = st.sidebar.checkbox("Likidite/hareket ön elemesi", value=True,
+                                     help="Tam analizden önce toplu kotasyonla sığ ve hareketsiz hisseleri ele")
+min_hacim_mn = st.sidebar.slider("Min. Günlük İşlem Hacmi (mn ₺)", 0, 500, 10)
+min_hareket = st.sidebar.slider("Min. 5 Günlük Hareket (%)", 0.0, 10.0, 0.0, step=0.5)
+
 st.sidebar.markdown("**İndikatör Ayarları**")
 rsi_alt = st.sidebar.slider("RSI Alım (<)", 20, 40, 30)
 rsi_ust = st.sidebar.slider("RSI Satış (>)", 60, 90, 70)
 atr_mult = st.sidebar.slider("Stop-Loss (ATR x)", 1.5, 3.0, 2.0)
 bb_length = st.sidebar.slider("Bollinger Bands", 10, 30, 20)
+veri_ayarlari['hedge'] = st.sidebar.checkbox(
+    "⚡ Hedged veri çekme", value=False,
+    help="Birincil kaynak p95 gecikmesini aşarsa sıradaki sağlıklı kaynağa paralel istek gönder"
+)
+otomatik_kaydet = st.sidebar.checkbox("💾 Taramayı otomatik kaydet", value=True,
+                                      help="Her taramayı Parquet anlık görüntüsü olarak sakla")
 
 # Hızlı seçim
+def hisse_secimini_ayarla(semboller):
+    """Hızlı seçim: hisse listesini widget çizilmeden önce güncelle"""
+    st.session_state['secilen_hisseler'] = list(semboller)
+
+def sektor_hisseleri(sektor):
+    """Sektör haritasından bir sektörün hisseleri"""
+    return [symbol for symbol, sek in sektorler.items() if sek == sektor]
+
+def sektor_secildi():
+    if st.session_state['quick_sector'] != "—":
+        hisse_secimini_ayarla(sektor_hisseleri(st.session_state['quick_sector']))
+
 st.sidebar.markdown("**⚡ Hızlı Seçim**")
 col1, col2 = st.sidebar.columns(2)
 with col1:
-    if st.button("✅ Tümünü Seç", use_container_width=True):
-        st.rerun()
+    st.button("✅ Tümünü Seç", use_container_width=True,
+              on_click=hisse_secimini_ayarla, args=(tum_hisseler,))
 with col2:
-    if st.button("🏦 Bankalar", use_container_width=True):
-        st.session_state['quick_select'] = ['AKBNK.IS', 'GARAN.IS', 'HALKB.IS', 'ISCTR.IS', 
-                                            'SKBNK.IS', 'TSKB.IS', 'VAKBN.IS', 'YKBNK.IS']
-        st.rerun()
+    st.button("🏦 Bankalar", use_container_width=True,
+              on_click=hisse_secimini_ayarla, args=(sektor_hisseleri("Bankacılık"),))
+st.sidebar.selectbox("🏭 Sektör:", ["—"] + sorted(set(sektorler.values())),
+                     key="quick_sector", on_change=sektor_secildi)
+
+# --- FAZ 1: ÖN ELEME ---
+@st.cache_data(ttl=300, show_spinner=False)
+def toplu_kotasyon(semboller):
+    """Tüm evren için tek istekte son 5 günün kapanış ve hacim verisi"""
+    try:
+        df = yf.download(list(semboller), period="5d", interval="1d", progress=False)
+        if df is None or df.empty:
+            return None, None
+        if isinstance(df.columns, pd.MultiIndex):
+            return df['Close'], df['Volume']
+        return (df[['Close']].rename(columns={'Close': semboller[0]}),
+                df[['Volume']].rename(columns={'Volume': semboller[0]}))
+    except Exception:
+        return None, None
+
+def on_eleme(hisse_listesi, min_hacim_tl, min_hareket_pct):
+    """
+    Faz 1: yalnızca son kapanış ve hacimle ön eleme.
+    Dönüş: (geçen hisseler, {'veri_yok', 'likidite', 'hareket'} elenen sayıları)
+    """
+    elenen = {'veri_yok': 0, 'likidite': 0, 'hareket': 0}
+    close, volume = toplu_kotasyon(tuple(hisse_listesi))
+    if close is None:
+        # Toplu kotasyon alınamadı: eleme yapmadan hepsini faz 2'ye bırak
+        return list(hisse_listesi), elenen
+    
+    close = close.reindex(columns=hisse_listesi)
+    volume = volume.reindex(columns=hisse_listesi)
+    son_kapanis = close.ffill().iloc[-1]
+    if son_kapanis.isna().all():
+        return list(hisse_listesi), elenen
+    
+    ilk_kapanis = close.bfill().iloc[0]
+    islem_hacmi = (close * volume).mean()
+    hareket = ((son_kapanis / ilk_kapanis - 1) * 100).abs()
+    
+    veri_yok = son_kapanis.isna()
+    likit_degil = ~veri_yok & (islem_hacmi.fillna(0) < min_hacim_tl)
+    hareketsiz = ~veri_yok & ~likit_degil & (hareket.fillna(0) < min_hareket_pct)
+    
+    elenen['veri_yok'] = int(veri_yok.sum())
+    elenen['likidite'] = int(likit_degil.sum())
+    elenen['hareket'] = int(hareketsiz.sum())
+    
+    gecen = ~(veri_yok | likit_degil | hareketsiz)
+    return [s for s in hisse_listesi if gecen[s]], elenen
 
 # --- GELİŞMİŞ ANALİZ MOTORU ---
 def karar_ver(rsi, macd_al, skor, bb_signal, stoch_signal):
@@ -458,6 +1402,16 @@ def karar_ver(rsi, macd_al, skor, bb_signal, stoch_signal):
     else: 
         return "🟡 İZLE"
 
+# Kararlar kategorik kod olarak saklanır; metrik grupları eski metin eşleşmelerini korur
+KARARLAR = ["🚀 GÜÇLÜ AL", "🚀 AL", "🟢 AL", "👀 DİP BÖLGE", "🟡 İZLE",
+            "⛔ UZAK DUR", "🔴 SAT", "🔴 GÜÇLÜ SAT"]
+KARAR_GRUPLARI = {
+    'guclu_al': ["🚀 GÜÇLÜ AL"],
+    'al': ["🚀 GÜÇLÜ AL", "🚀 AL", "🟢 AL"],
+    'sat': ["🔴 SAT", "🔴 GÜÇLÜ SAT"],
+    'izle': ["🟡 İZLE"],
+}
+
 def yapay_zeka_yorumu(rsi, macd_al, golden_cross, trend_guclu, mum_formasyonu, bb_signal, 
                       stoch_signal, volume_signal):
     """Geliştirilmiş AI yorumu"""
@@ -489,218 +1443,286 @@ def yapay_zeka_yorumu(rsi, macd_al, golden_cross, trend_guclu, mum_formasyonu, b
     
     return " | ".join(yorumlar) if yorumlar else "Normal piyasa koşulları"
 
+def hisse_analiz(symbol, df, interval="1d"):
+    """Tek hisse: indikatörleri kayıttan al, sinyal ve kararı üret -> (sonuç satırı | None, gösterge)"""
+    def ind(ad, **parametreler):
+        return indikator_al(symbol, interval, df, ad, **parametreler)
+    
+    # --- SİNYAL ÜRETİMİ ---
+    son = df.iloc[-1]
+    
+    fiyat = round(son['Close'], 2)
+    rsi_seri = ind("RSI")
+    rsi = round(rsi_seri.iloc[-1], 2) if rsi_seri is not None and not pd.isna(rsi_seri.iloc[-1]) else 50
+    atr_seri = ind("ATR")
+    atr_val = atr_seri.iloc[-1] if atr_seri is not None and not pd.isna(atr_seri.iloc[-1]) else 0
+    stop_loss = round(fiyat - (atr_val * atr_mult), 2)
+    
+    sinyaller_listesi = []
+    skor = 0
+    
+    # RSI
+    if rsi < rsi_alt: 
+        sinyaller_listesi.append("🟢 RSI DİP")
+        skor += 2
+    elif rsi > rsi_ust: 
+        sinyaller_listesi.append("🔴 RSI ZİRVE")
+        skor -= 2
+    
+    # MACD
+    macd_al = False
+    try:
+        macd = ind("MACD")
+        macd_line = _sutun(macd, 'MACD_')
+        signal_line = _sutun(macd, 'MACDs_')
+        if macd_line.iloc[-1] > signal_line.iloc[-1] and macd_line.iloc[-2] < signal_line.iloc[-2]:
+            macd_al = True
+            sinyaller_listesi.append("🚀 MACD AL")
+            skor += 3
+    except: 
+        pass
+    
+    # Golden Cross
+    golden_cross = False
+    sma_50 = ind("SMA", length=50)
+    sma_200 = ind("SMA", length=200)
+    if sma_50 is not None and sma_200 is not None:
+        if sma_50.iloc[-1] > sma_200.iloc[-1] and sma_50.iloc[-2] < sma_200.iloc[-2]:
+            golden_cross = True
+            sinyaller_listesi.append("⭐ GOLDEN CROSS")
+            skor += 5
+    
+    # Trend
+    trend_guclu = False
+    try:
+        adx_col = _sutun(ind("ADX"), 'ADX_')
+        if adx_col.iloc[-1] > 25: 
+            trend_guclu = True
+            sinyaller_listesi.append("💪 GÜÇLÜ TREND")
+            skor += 1
+    except: 
+        pass
+    
+    # Bollinger Bands
+    bb_signal = None
+    try:
+        bb = ind("BBANDS", length=bb_length)
+        bb_lower = _sutun(bb, 'BBL_')
+        bb_upper = _sutun(bb, 'BBU_')
+        
+        if son['Close'] < bb_lower.iloc[-1]:
+            bb_signal = "AL"
+            sinyaller_listesi.append("📊 BB DİP")
+            skor += 2
+        elif son['Close'] > bb_upper.iloc[-1]:
+            bb_signal = "SAT"
+            sinyaller_listesi.append("📊 BB ZİRVE")
+            skor -= 2
+    except: 
+        pass
+    
+    # Stochastic
+    stoch_signal = None
+    try:
+        stoch = ind("STOCH")
+        stoch_k = _sutun(stoch, 'STOCHk_').iloc[-1]
+        stoch_d = _sutun(stoch, 'STOCHd_').iloc[-1]
+        
+        if stoch_k < 20 and stoch_k > stoch_d:
+            stoch_signal = "AL"
+            sinyaller_listesi.append("📈 STOCH AL")
+            skor += 2
+        elif stoch_k > 80:
+            stoch_signal = "SAT"
+            sinyaller_listesi.append("📉 STOCH SAT")
+            skor -= 1
+    except: 
+        pass
+    
+    # Volume
+    volume_signal = None
+    hacim_sma = ind("HACIM_SMA")
+    if hacim_sma is not None and son['Volume'] > hacim_sma.iloc[-1] * 1.5:
+        volume_signal = "YÜKSEK HACİM"
+        sinyaller_listesi.append("📊 YÜKSEK HACİM")
+        skor += 1
+    
+    # OBV
+    try:
+        obv = ind("OBV")
+        obv_sma = obv.rolling(window=20).mean()
+        if obv.iloc[-1] > obv_sma.iloc[-1]:
+            sinyaller_listesi.append("💰 PARA GİRİŞİ")
+            skor += 1
+    except: 
+        pass
+    
+    # Mum formasyonları
+    mum_formasyonu = ""
+    try:
+        if _sutun(ind("CDL_ENGULFING"), 'CDL_ENGULFING').iloc[-1] == 100:
+            mum_formasyonu = "Yutan Boğa"
+            sinyaller_listesi.append("🔥 YUTAN BOĞA")
+            skor += 2
+    except: 
+        pass
+    try:
+        if _sutun(ind("CDL_HAMMER"), 'CDL_HAMMER').iloc[-1] == 100:
+            mum_formasyonu = "Çekiç"
+            sinyaller_listesi.append("🔨 ÇEKİÇ")
+            skor += 2
+    except: 
+        pass
+    
+    # Portföy kontrolü
+    hisse_adi = symbol.replace(".IS", "")
+    if hisse_adi in st.session_state['portfolio']:
+        sinyaller_listesi.append(PORTFOY_ISARETI)
+    
+    # Karar
+    karar = karar_ver(rsi, macd_al, skor, bb_signal, stoch_signal)
+    ai_yorum = yapay_zeka_yorumu(rsi, macd_al, golden_cross, trend_guclu, 
+                                mum_formasyonu, bb_signal, stoch_signal, volume_signal)
+    
+    # Hedefler
+    risk = max(0, fiyat - stop_loss)
+    hedef_1 = fiyat + (risk * 2)
+    hedef_2 = fiyat + (risk * 3)
+    
+    # Genişlik hesapları ve ekran sorguları için her hissenin son gösterge değerleri
+    # (indikatörler önbellekten okunur, yeniden hesaplanmaz)
+    def son_deger(cikti, onek=None):
+        try:
+            return float((_sutun(cikti, onek) if onek else cikti).iloc[-1])
+        except Exception:
+            return np.nan
+    
+    bb = ind("BBANDS", length=bb_length)
+    gosterge = {
+        "Hisse": hisse_adi,
+        "Sektör": sektorler.get(symbol, "Diğer"),
+        "Kapanış": son['Close'],
+        "Önceki Kapanış": df['Close'].iloc[-2],
+        "RSI": son_deger(rsi_seri),
+        "MACD": son_deger(ind("MACD"), 'MACD_'),
+        "MACD Sinyal": son_deger(ind("MACD"), 'MACDs_'),
+        "SMA_50": son_deger(sma_50),
+        "SMA_200": son_deger(sma_200),
+        "ADX": son_deger(ind("ADX"), 'ADX_'),
+        "ATR": son_deger(atr_seri),
+        "BB Alt": son_deger(bb, 'BBL_'),
+        "BB Orta": son_deger(bb, 'BBM_'),
+        "BB Üst": son_deger(bb, 'BBU_'),
+        "Stoch K": son_deger(ind("STOCH"), 'STOCHk_'),
+        "Stoch D": son_deger(ind("STOCH"), 'STOCHd_'),
+        "OBV": son_deger(ind("OBV")),
+        "Hacim Oranı": son['Volume'] / son_deger(hacim_sma) if son_deger(hacim_sma) else np.nan,
+        "Yutan": son_deger(ind("CDL_ENGULFING"), 'CDL_ENGULFING'),
+        "Çekiç": son_deger(ind("CDL_HAMMER"), 'CDL_HAMMER'),
+        "Skor": skor,
+        "Karar": karar,
+    }
+    
+    if len(sinyaller_listesi) > 0 or hisse_adi in st.session_state['portfolio']:
+        return {
+            "Hisse": hisse_adi,
+            "Fiyat": fiyat,
+            "RSI": rsi,
+            "Skor": skor,
+            "Sinyaller": " | ".join(sinyaller_listesi),
+            "AI Yorum": ai_yorum,
+            "Karar": karar,
+            "Stop-Loss": stop_loss,
+            "Hedef 1:2": hedef_1,
+            "Hedef 1:3": hedef_2,
+        }, gosterge
+    return None, gosterge
+
+def gosterge_paneli_olustur(gostergeler):
+    """Hisse başına son gösterge değerlerinden panel (karar kategorik)"""
+    panel = pd.DataFrame(gostergeler)
+    if not panel.empty:
+        panel['Karar'] = pd.Categorical(panel['Karar'], categories=KARARLAR)
+    return panel
+
+TARAMA_PARCA_MAX = 32   # toplu çekirdek hesabına giren en büyük parça
+ARA_CIZIM_ARALIGI = 0.5  # saniye; akış sırasında tablo en fazla bu sıklıkla yeniden çizilir
+ARA_TABLO_SATIR = 25
+
+def tarama_akisi(hisse_listesi, source_counter):
+    """
+    Taramayı akış olarak yürüt: hisseler sırayla çekilir (yfinance iş parçacığı güvenli değil),
+    1, 2, 4... hisselik büyüyen parçalar halinde toplu indikatör hesabından geçer ve her hissenin
+    sonucu hazır olur olmaz (işlenen, sembol, satır | None, gösterge) olarak verilir.
+    Parçanın çerçeveleri puanlandıktan sonra bırakılır. Çekirdek yoksa toplu hesap kazanç
+    sağlamadığından parça 1'de kalır ve her hisse beklemeden verilir.
+    """
+    parca = {}
+    parca_boyutu = 1
+    parca_ust_sinir = TARAMA_PARCA_MAX if hizli_cekirdekler() is not None else 1
+    for i, symbol in enumerate(hisse_listesi):
+        try:
+            # Önbellekli hybrid veri çekme
+            df, source = fiyat_gecmisi(symbol, period="1y", interval="1d")
+            
+            if df is not None and not df.empty and len(df) >= 100:
+                # Kaynak sayacını güncelle
+                if source:
+                    source_counter[source] = source_counter.get(source, 0) + 1
+                    if veri_ayarlari['replay'] is None:
+                        st.session_state['data_source'] = source
+                parca[symbol] = df
+        except Exception:
+            pass
+        
+        if len(parca) < parca_boyutu and i < len(hisse_listesi) - 1:
+            continue
+        
+        # Yol bağımlı indikatörler parçadaki hisseler için tek çekirdek çağrısıyla (numba varsa)
+        indikatorleri_toplu_hesapla(parca, "1d", TOPLU_INDIKATORLER)
+        for parca_symbol, df in parca.items():
+            try:
+                satir, gosterge = hisse_analiz(parca_symbol, df, interval="1d")
+            except Exception:
+                continue
+            yield i + 1, parca_symbol, satir, gosterge
+        parca = {}
+        parca_boyutu = min(parca_boyutu * 2, parca_ust_sinir)
+
+def ara_sonuclari_ciz(alan, sonuclar):
+    """Akış sırasında gelen sonuçları skor sırasıyla metrik ve tablo olarak çiz"""
+    df, sayilar = sonuclari_hazirla(pd.DataFrame(sonuclar))
+    with alan.container():
+        kolonlar = st.columns(4)
+        for kolon, (etiket, grup) in zip(kolonlar, (("🚀 Güçlü Alım", 'guclu_al'), ("🟢 Alım", 'al'),
+                                                     ("🔴 Satım", 'sat'), ("🟡 İzleme", 'izle'))):
+            kolon.metric(etiket, sum(sayilar[k] for k in KARAR_GRUPLARI[grup]))
+        st.dataframe(df.head(ARA_TABLO_SATIR), column_order=("Hisse", "Fiyat", "RSI", "Skor", "Sinyaller", "Karar"),
+                     hide_index=True, use_container_width=True)
+
 def verileri_getir(hisse_listesi):
-    """Ana analiz motoru - Hybrid veri çekme ile"""
+    """Ana analiz motoru - sonuçlar geldikçe çizilir -> (sonuç tablosu, gösterge paneli)"""
     sonuclar = []
+    gostergeler = []
     bar = st.progress(0)
     status = st.empty()
+    ara_sonuc_alani = st.empty()
     source_counter = {'yahoo': 0, 'rapidapi': 0, 'investing': 0}
     
-    for i, symbol in enumerate(hisse_listesi):
-        bar.progress((i + 1) / len(hisse_listesi))
-        status.caption(f"🔍 Analiz: {symbol} ({i+1}/{len(hisse_listesi)})")
-        
-        try:
-            # Hybrid veri çekme
-            df, source = hybrid_data_fetch(symbol, period="1y", interval="1d")
-            
-            if df is None or df.empty or len(df) < 100:
-                continue
-            
-            # Kaynak sayacını güncelle
-            if source:
-                source_counter[source] = source_counter.get(source, 0) + 1
-                st.session_state['data_source'] = source
-            
-            # --- TEMEL İNDİKATÖRLER ---
-            df['RSI'] = df.ta.rsi(length=14)
-            
-            macd = df.ta.macd(fast=12, slow=26, signal=9)
-            if macd is not None: 
-                df = pd.concat([df, macd], axis=1)
-            
-            df['SMA_50'] = df.ta.sma(length=50)
-            df['SMA_200'] = df.ta.sma(length=200)
-            
-            adx = df.ta.adx(length=14)
-            if adx is not None: 
-                df = pd.concat([df, adx], axis=1)
-            
-            df['ATR'] = df.ta.atr(length=14)
-            
-            # --- GELİŞMİŞ İNDİKATÖRLER ---
-            bb = df.ta.bbands(length=bb_length, std=2)
-            if bb is not None:
-                df = pd.concat([df, bb], axis=1)
-            
-            stoch = df.ta.stoch(k=14, d=3, smooth_k=3)
-            if stoch is not None:
-                df = pd.concat([df, stoch], axis=1)
-            
-            df['OBV'] = df.ta.obv()
-            df['Volume_SMA'] = df['Volume'].rolling(window=20).mean()
-            
-            try:
-                engulf = df.ta.cdl_engulfing()
-                hammer = df.ta.cdl_hammer()
-                if engulf is not None: 
-                    df = pd.concat([df, engulf], axis=1)
-                if hammer is not None: 
-                    df = pd.concat([df, hammer], axis=1)
-            except: 
-                pass
-            
-            # --- SİNYAL ÜRETİMİ ---
-            son = df.iloc[-1]
-            onceki = df.iloc[-2]
-            
-            fiyat = round(son['Close'], 2)
-            rsi = round(son['RSI'], 2) if not pd.isna(son['RSI']) else 50
-            atr_val = son['ATR'] if not pd.isna(son['ATR']) else 0
-            stop_loss = round(fiyat - (atr_val * atr_mult), 2)
-            
-            sinyaller_listesi = []
-            skor = 0
-            
-            # RSI
-            if rsi < rsi_alt: 
-                sinyaller_listesi.append("🟢 RSI DİP")
-                skor += 2
-            elif rsi > rsi_ust: 
-                sinyaller_listesi.append("🔴 RSI ZİRVE")
-                skor -= 2
-            
-            # MACD
-            macd_al = False
-            try:
-                macd_line = [col for col in df.columns if col.startswith('MACD_')][0]
-                signal_line = [col for col in df.columns if col.startswith('MACDs_')][0]
-                if son[macd_line] > son[signal_line] and onceki[macd_line] < onceki[signal_line]:
-                    macd_al = True
-                    sinyaller_listesi.append("🚀 MACD AL")
-                    skor += 3
-            except: 
-                pass
-            
-            # Golden Cross
-            golden_cross = False
-            if son['SMA_50'] > son['SMA_200'] and onceki['SMA_50'] < onceki['SMA_200']:
-                golden_cross = True
-                sinyaller_listesi.append("⭐ GOLDEN CROSS")
-                skor += 5
-            
-            # Trend
-            trend_guclu = False
-            try:
-                adx_col = [col for col in df.columns if col.startswith('ADX_')][0]
-                if son[adx_col] > 25: 
-                    trend_guclu = True
-                    sinyaller_listesi.append("💪 GÜÇLÜ TREND")
-                    skor += 1
-            except: 
-                pass
-            
-            # Bollinger Bands
-            bb_signal = None
-            try:
-                bb_lower = [col for col in df.columns if 'BBL_' in col][0]
-                bb_upper = [col for col in df.columns if 'BBU_' in col][0]
-                
-                if son['Close'] < son[bb_lower]:
-                    bb_signal = "AL"
-                    sinyaller_listesi.append("📊 BB DİP")
-                    skor += 2
-                elif son['Close'] > son[bb_upper]:
-                    bb_signal = "SAT"
-                    sinyaller_listesi.append("📊 BB ZİRVE")
-                    skor -= 2
-            except: 
-                pass
-            
-            # Stochastic
-            stoch_signal = None
-            try:
-                stoch_k = [col for col in df.columns if 'STOCHk_' in col][0]
-                stoch_d = [col for col in df.columns if 'STOCHd_' in col][0]
-                
-                if son[stoch_k] < 20 and son[stoch_k] > son[stoch_d]:
-                    stoch_signal = "AL"
-                    sinyaller_listesi.append("📈 STOCH AL")
-                    skor += 2
-                elif son[stoch_k] > 80:
-                    stoch_signal = "SAT"
-                    sinyaller_listesi.append("📉 STOCH SAT")
-                    skor -= 1
-            except: 
-                pass
-            
-            # Volume
-            volume_signal = None
-            if son['Volume'] > son['Volume_SMA'] * 1.5:
-                volume_signal = "YÜKSEK HACİM"
-                sinyaller_listesi.append("📊 YÜKSEK HACİM")
-                skor += 1
-            
-            # OBV
-            try:
-                obv_sma = df['OBV'].rolling(window=20).mean()
-                if son['OBV'] > obv_sma.iloc[-1]:
-                    sinyaller_listesi.append("💰 PARA GİRİŞİ")
-                    skor += 1
-            except: 
-                pass
-            
-            # Mum formasyonları
-            mum_formasyonu = ""
-            try:
-                engulf_col = [col for col in df.columns if 'CDL_ENGULFING' in col][0]
-                if son[engulf_col] == 100:
-                    mum_formasyonu = "Yutan Boğa"
-                    sinyaller_listesi.append("🔥 YUTAN BOĞA")
-                    skor += 2
-                    
-                hammer_col = [col for col in df.columns if 'CDL_HAMMER' in col][0]
-                if son[hammer_col] == 100:
-                    mum_formasyonu = "Çekiç"
-                    sinyaller_listesi.append("🔨 ÇEKİÇ")
-                    skor += 2
-            except: 
-                pass
-            
-            # Portföy kontrolü
-            hisse_adi = symbol.replace(".IS", "")
-            if hisse_adi in st.session_state['portfolio']:
-                sinyaller_listesi.append("💼 PORTFÖYDE")
-            
-            # Karar
-            karar = karar_ver(rsi, macd_al, skor, bb_signal, stoch_signal)
-            ai_yorum = yapay_zeka_yorumu(rsi, macd_al, golden_cross, trend_guclu, 
-                                        mum_formasyonu, bb_signal, stoch_signal, volume_signal)
-            
-            # Hedefler
-            risk = max(0, fiyat - stop_loss)
-            hedef_1 = fiyat + (risk * 2)
-            hedef_2 = fiyat + (risk * 3)
-            
-            if len(sinyaller_listesi) > 0 or hisse_adi in st.session_state['portfolio']:
-                sonuclar.append({
-                    "Hisse": hisse_adi,
-                    "Fiyat": fiyat,
-                    "RSI": rsi,
-                    "Skor": skor,
-                    "Sinyaller": " | ".join(sinyaller_listesi),
-                    "AI Yorum": ai_yorum,
-                    "Karar": karar,
-                    "Stop-Loss": stop_loss,
-                    "Hedef 1:2": hedef_1,
-                    "Hedef 1:3": hedef_2,
-                })
-                        
-        except Exception as e:
-            continue
+    son_cizim = 0.0
+    for islenen, symbol, satir, gosterge in tarama_akisi(hisse_listesi, source_counter):
+        bar.progress(islenen / len(hisse_listesi))
+        status.caption(f"🔍 Analiz: {symbol} ({islenen}/{len(hisse_listesi)}) | {len(sonuclar)} sinyal")
+        gostergeler.append(gosterge)
+        if satir is not None:
+            sonuclar.append(satir)
+            if time.perf_counter() - son_cizim > ARA_CIZIM_ARALIGI:
+                ara_sonuclari_ciz(ara_sonuc_alani, sonuclar)
+                son_cizim = time.perf_counter()
     
     bar.empty()
     status.empty()
+    ara_sonuc_alani.empty()
     
     # Veri kaynağı istatistikleri
     if source_counter:
@@ -709,7 +1731,318 @@ def verileri_getir(hisse_listesi):
                f"RapidAPI: {source_counter.get('rapidapi', 0)}/{total} | "
                f"Investing: {source_counter.get('investing', 0)}/{total}")
     
-    return pd.DataFrame(sonuclar)
+    return pd.DataFrame(sonuclar), gosterge_paneli_olustur(gostergeler)
+
+# --- PİYASA GENİŞLİĞİ ---
+def piyasa_genisligi(panel):
+    """
+    Gösterge panelinden tek vektörel geçişte sektör ve piyasa geneli genişlik:
+    yükselen/düşen, SMA_200 üstü oranı, ortalama RSI ve karar sayıları.
+    """
+    degisim = panel['Kapanış'] - panel['Önceki Kapanış']
+    hesap = pd.concat([
+        panel[['Sektör', 'RSI']],
+        pd.DataFrame({
+            'Yükselen': (degisim > 0).astype(int),
+            'Düşen': (degisim < 0).astype(int),
+            'SMA200 Üstü %': (panel['Kapanış'] > panel['SMA_200']).astype(float)
+                              .where(panel['SMA_200'].notna()) * 100,
+        }),
+        pd.get_dummies(panel['Karar']).astype(int),
+    ], axis=1)
+    
+    toplamlar = {'Yükselen': 'sum', 'Düşen': 'sum', 'SMA200 Üstü %': 'mean', 'RSI': 'mean',
+                 **{k: 'sum' for k in KARARLAR}}
+    sektorel = hesap.groupby('Sektör').agg(toplamlar)
+    sektorel.insert(0, 'Hisse', hesap.groupby('Sektör').size())
+    genel = hesap.drop(columns='Sektör').agg(toplamlar)
+    genel['Hisse'] = len(hesap)
+    return sektorel.rename(columns={'RSI': 'Ort. RSI'}), genel.rename({'RSI': 'Ort. RSI'})
+
+# --- EKRAN SORGULARI ---
+# İfade derleyicisi ve kolon eşlemesi bist_ekran modülündedir
+def gostergeleri_kaydet(panel):
+    """Taramadaki hisselerin son gösterge değerlerini son_indikatorler tablosuna yaz (upsert)"""
+    if panel is None or panel.empty:
+        return
+    tablo = panel[list(GOSTERGE_KOLONLARI)].rename(columns=GOSTERGE_KOLONLARI)
+    tablo['karar'] = tablo['karar'].astype(str)
+    tablo.insert(2, 'zaman', datetime.now().isoformat(timespec="seconds"))
+    db_coklu_calistir(
+        f"INSERT OR REPLACE INTO son_indikatorler ({', '.join(tablo.columns)}) "
+        f"VALUES ({', '.join('?' * len(tablo.columns))})",
+        tablo.astype(object).where(tablo.notna(), None).itertuples(index=False, name=None))
+
+def ekran_calistir(ifade, siralama="skor", azalan=True, limit=200):
+    """
+    Ekran ifadesini son_indikatorler tablosunda çalıştır -> (sonuç, süre sn).
+    Veri çekmez, indikatör hesaplamaz; yalnızca son taramaların kaydını sorgular.
+    """
+    kosul, parametreler = ekran_sql(ifade) if ifade.strip() else ("1", [])
+    if siralama not in EKRAN_KOLONLARI:
+        raise ValueError(f"Bilinmeyen sıralama kolonu: {siralama}")
+    t0 = time.perf_counter()
+    sonuc = db_oku(f"SELECT * FROM son_indikatorler WHERE {kosul} "
+                   f"ORDER BY {siralama} {'DESC' if azalan else 'ASC'} LIMIT ?",
+                   (*parametreler, int(limit)))
+    return sonuc, time.perf_counter() - t0
+
+# --- SONUÇ TABLOSU ---
+def sonuclari_hazirla(df):
+    """Tarama çıktısını bir kez skora göre sırala, kararı kategorik koda çevir ve say"""
+    if df.empty:
+        return df, {k: 0 for k in KARARLAR}
+    df = df.sort_values(by="Skor", ascending=False, kind="stable").reset_index(drop=True)
+    df['Karar'] = pd.Categorical(df['Karar'], categories=KARARLAR)
+    adetler = np.bincount(df['Karar'].cat.codes[df['Karar'].cat.codes >= 0], minlength=len(KARARLAR))
+    return df, dict(zip(KARARLAR, adetler.tolist()))
+
+def tarama_verisini_ayarla(sonuclar):
+    """Sonuç tablosunu oturuma yaz; her yeni tabloya sıralama önbelleği için yeni bir kimlik ver"""
+    st.session_state['data'], st.session_state['karar_sayilari'] = sonuclari_hazirla(sonuclar)
+    st.session_state['tarama_kimligi'] = time.time_ns()
+
+def siralama_indeksi(df, kolon, artan):
+    """Kolon sıralamasının permütasyonu (tarama kimliği değişene kadar oturumda saklanır)"""
+    onbellek = st.session_state.setdefault('siralama_onbellegi', {})
+    anahtar = (st.session_state.get('tarama_kimligi'), kolon, artan)
+    if anahtar not in onbellek:
+        if kolon == "Skor" and not artan:
+            sira = np.arange(len(df))  # veri zaten skora göre azalan sıralı
+        else:
+            sira = np.argsort(df[kolon].to_numpy(), kind="stable")
+            if not artan:
+                sira = sira[::-1]
+        onbellek.clear()
+        onbellek[anahtar] = sira
+    return onbellek[anahtar]
+
+def sonuc_filtrele(df, kararlar, skor_araligi, rsi_araligi, portfoy_filtresi, kolon, artan):
+    """Sunucu tarafında filtrele ve sırala; seçili satırların sıralı konum dizisini döndür"""
+    maske = np.ones(len(df), dtype=bool)
+    if kararlar:
+        maske &= df['Karar'].isin(kararlar).to_numpy()
+    skor = df['Skor'].to_numpy()
+    maske &= (skor >= skor_araligi[0]) & (skor <= skor_araligi[1])
+    rsi = df['RSI'].to_numpy()
+    maske &= (rsi >= rsi_araligi[0]) & (rsi <= rsi_araligi[1])
+    if portfoy_filtresi != "Tümü":
+        portfoyde = df['Hisse'].isin(list(st.session_state['portfolio'])).to_numpy()
+        maske &= portfoyde if portfoy_filtresi == "Portföyde" else ~portfoyde
+    
+    sira = siralama_indeksi(df, kolon, artan)
+    return sira[maske[sira]]
+
+# --- TARAMA ANLIK GÖRÜNTÜLERİ ---
+TARAMA_DIZINI = os.environ.get(
+    "BIST_TARAMA_DIZINI",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "taramalar")
+)
+OTOMATIK_GERI_YUKLE = os.environ.get("BIST_OTOMATIK_GERI_YUKLE", "1") != "0"
+TARAMA_SAKLAMA = int(os.environ.get("BIST_TARAMA_SAKLAMA", "30"))  # saklanacak en fazla anlık görüntü (0: sınırsız)
+PORTFOY_ISARETI = "💼 PORTFÖYDE"
+
+def parquet_destegi():
+    """Parquet yazıp okumak için pyarrow kurulu mu"""
+    return importlib.util.find_spec("pyarrow") is not None
+
+def indikator_paneli(symbol, df, interval="1d"):
+    """Hissenin OHLCV ve taramadaki tüm indikatör kolonları (kayıttan, yeniden hesaplamadan)"""
+    parcalar = [df[['Open', 'High', 'Low', 'Close', 'Volume']]]
+    for ad, parametreler in ISITILACAK_INDIKATORLER + (("BBANDS", {'length': bb_length}),
+                                                       ("CDL_ENGULFING", {}), ("CDL_HAMMER", {})):
+        sonuc = indikator_al(symbol, interval, df, ad, **parametreler)
+        if sonuc is None:
+            continue
+        if isinstance(sonuc, pd.Series):
+            sonuc = sonuc.rename("_".join([ad] + [str(v) for v in parametreler.values()]))
+        parcalar.append(sonuc)
+    panel = pd.concat(parcalar, axis=1)
+    return panel.loc[:, ~panel.columns.duplicated()]
+
+def tarama_kaydet(sonuclar, semboller, parametreler):
+    """
+    Taramayı Parquet anlık görüntüsü olarak kaydet: sonuç tablosu, hisse başına
+    indikatör panelleri ve parametreler/zaman/portföy anahtarı (meta.json).
+    """
+    zaman = datetime.now()
+    os.makedirs(TARAMA_DIZINI, exist_ok=True)
+    # Aynı anda kaydedilen taramalar birbirinin üzerine yazmasın
+    ad = zaman.strftime("%Y%m%d_%H%M%S_%f")
+    dizin, ek = os.path.join(TARAMA_DIZINI, ad), 0
+    while True:
+        try:
+            os.mkdir(dizin)
+            break
+        except FileExistsError:
+            ek += 1
+            dizin = os.path.join(TARAMA_DIZINI, f"{ad}_{ek}")
+    
+    sonuclar.to_parquet(os.path.join(dizin, "sonuclar.parquet"), index=False)
+    if st.session_state.get('gosterge_paneli') is not None:
+        st.session_state['gosterge_paneli'].to_parquet(os.path.join(dizin, "gostergeler.parquet"), index=False)
+    
+    paneller = []
+    for symbol in semboller:
+        kayit = fiyat_kaydi((symbol, "1y", "1d"))
+        if kayit is None:
+            continue
+        panel = indikator_paneli(symbol, kayit[0])
+        panel.insert(0, 'Hisse', symbol)
+        paneller.append(panel)
+    if paneller:
+        (pd.concat(paneller).rename_axis('Tarih').reset_index()
+         .to_parquet(os.path.join(dizin, "paneller.parquet"), index=False))
+    
+    with open(os.path.join(dizin, "meta.json"), "w") as f:
+        json.dump({
+            'zaman': zaman.isoformat(timespec="seconds"),
+            'portfoy': aktif_portfoy,
+            'parametreler': parametreler,
+            'semboller': list(semboller),
+            'tarama_ozeti': st.session_state.get('tarama_ozeti'),
+        }, f, ensure_ascii=False)
+    taramalari_buda()
+    return dizin
+
+def taramalari_buda(saklanacak=TARAMA_SAKLAMA):
+    """En yeni anlık görüntüler dışındakileri sil (dizin sınırsız büyümesin)"""
+    if saklanacak <= 0 or not os.path.isdir(TARAMA_DIZINI):
+        return
+    kayitlar = sorted((ad for ad in os.listdir(TARAMA_DIZINI)
+                       if re.fullmatch(r"\d{8}_\d{6}(_\d+)*", ad)
+                       and os.path.isdir(os.path.join(TARAMA_DIZINI, ad))), reverse=True)
+    for ad in kayitlar[saklanacak:]:
+        shutil.rmtree(os.path.join(TARAMA_DIZINI, ad), ignore_errors=True)
+
+def tarama_listesi():
+    """Kayıtlı anlık görüntüler (en yeni önce)"""
+    if not os.path.isdir(TARAMA_DIZINI):
+        return []
+    return sorted((ad for ad in os.listdir(TARAMA_DIZINI)
+                   if os.path.exists(os.path.join(TARAMA_DIZINI, ad, "sonuclar.parquet"))), reverse=True)
+
+def son_portfoy_taramasi(portfoy):
+    """Portföy anahtarıyla etiketlenmiş en yeni anlık görüntü (yoksa None)"""
+    for ad in tarama_listesi():
+        try:
+            with open(os.path.join(TARAMA_DIZINI, ad, "meta.json")) as f:
+                if json.load(f).get('portfoy') == portfoy:
+                    return ad
+        except (OSError, ValueError):
+            continue
+    return None
+
+@st.cache_data(show_spinner=False)
+def tarama_yukle(ad):
+    """Anlık görüntünün sonuç tablosu ve meta bilgisi"""
+    dizin = os.path.join(TARAMA_DIZINI, ad)
+    sonuclar = pd.read_parquet(os.path.join(dizin, "sonuclar.parquet"))
+    with open(os.path.join(dizin, "meta.json")) as f:
+        meta = json.load(f)
+    return sonuclar, meta
+
+@st.cache_data(show_spinner=False)
+def panelleri_yukle(ad, hisse=None):
+    """Anlık görüntünün indikatör panelleri (isteğe bağlı tek hisse)"""
+    dosya = os.path.join(TARAMA_DIZINI, ad, "paneller.parquet")
+    if not os.path.exists(dosya):
+        return pd.DataFrame()
+    filtre = [('Hisse', '==', hisse)] if hisse else None
+    return pd.read_parquet(dosya, filters=filtre).set_index('Tarih')
+
+def portfoy_isaretlerini_guncelle(sonuclar):
+    """
+    Anlık görüntüdeki portföy işaretlerini aktif portföye göre yeniden kur. Taramada
+    yalnızca başka bir portföyde olduğu için tabloya giren (sinyalsiz) satırlar düşer.
+    """
+    portfoy = st.session_state['portfolio']
+    sinyaller = [[s for s in str(satir).split(" | ") if s and s != PORTFOY_ISARETI]
+                 + ([PORTFOY_ISARETI] if hisse in portfoy else [])
+                 for hisse, satir in zip(sonuclar['Hisse'], sonuclar['Sinyaller'])]
+    sonuclar = sonuclar.assign(Sinyaller=[" | ".join(s) for s in sinyaller])
+    return sonuclar[[len(s) > 0 for s in sinyaller]].reset_index(drop=True)
+
+def taramayi_geri_yukle(ad):
+    """Anlık görüntüden oturum durumunu ve fiyat önbelleğini yeniden kur (veri çekmeden)"""
+    sonuclar, meta = tarama_yukle(ad)
+    tarama_verisini_ayarla(portfoy_isaretlerini_guncelle(sonuclar))
+    st.session_state['tarama_ozeti'] = meta.get('tarama_ozeti')
+    st.session_state['geri_yuklenen'] = meta['zaman']
+    gosterge_dosyasi = os.path.join(TARAMA_DIZINI, ad, "gostergeler.parquet")
+    st.session_state['gosterge_paneli'] = (gosterge_paneli_olustur(pd.read_parquet(gosterge_dosyasi))
+                                           if os.path.exists(gosterge_dosyasi) else None)
+    st.session_state['taranan_hisseler'] = taranan_hisseler(st.session_state['gosterge_paneli'],
+                                                            meta['semboller'])
+    
+    # Paneldeki OHLCV fiyat önbelleğine anlık görüntü zamanıyla eklenir; TTL normal işler
+    zaman = datetime.fromisoformat(meta['zaman']).timestamp()
+    for symbol, panel in panelleri_yukle(ad).groupby('Hisse'):
+        fiyat_kaydet((symbol, "1y", "1d"),
+                     (panel[['Open', 'High', 'Low', 'Close', 'Volume']], "snapshot", zaman), uzerine_yaz=False)
+
+DEGISIM_TURLERI = ["🆕 Yeni sinyal", "❌ Kayboldu", "🔀 Karar değişti", "↕️ Skor değişti"]
+TARANMADI = "⏸️ Taranmadı"
+
+def taranan_hisseler(panel, semboller=()):
+    """Taramada gerçekten analiz edilen hisseler (gösterge panelinden; panel yoksa aday sembollerden)"""
+    if panel is not None:
+        return set(panel['Hisse']) if not panel.empty else set()
+    return {symbol.replace(".IS", "") for symbol in semboller}
+
+def kayit_taranan(ad):
+    """Anlık görüntüde analiz edilen hisseler"""
+    gosterge_dosyasi = os.path.join(TARAMA_DIZINI, ad, "gostergeler.parquet")
+    panel = pd.read_parquet(gosterge_dosyasi, columns=['Hisse']) if os.path.exists(gosterge_dosyasi) else None
+    return taranan_hisseler(panel, tarama_yukle(ad)[1]['semboller'])
+
+def tarama_farki(eski, yeni, taranan=None, sadece_degisenler=True):
+    """
+    Hisse anahtarlı tarama farkı: yeni/kaybolan sinyaller, karar dönüşleri ve skor değişimleri.
+    Tek bir indeks birleştirmesi ve vektörel karşılaştırmalar - her taramada çalıştırılabilir.
+    taranan verilirse yalnızca bu hisseler karşılaştırılır; dışındakiler (seçim daraldı, faz 1'de
+    elendi, veri çekilemedi) kaybolmuş değil "Taranmadı" sayılır.
+    """
+    kolonlar = ['Hisse', 'Skor', 'Karar']
+    def hazirla(df):
+        if df is None or df.empty:
+            return pd.DataFrame(columns=kolonlar).set_index('Hisse')
+        return df[kolonlar].astype({'Karar': object}).set_index('Hisse')
+    
+    birlesik = hazirla(eski).join(hazirla(yeni), how='outer', lsuffix=' (eski)', rsuffix=' (yeni)')
+    yeni_sinyal = birlesik['Karar (eski)'].isna()
+    kayboldu = birlesik['Karar (yeni)'].isna()
+    karar_donusu = ~yeni_sinyal & ~kayboldu & (birlesik['Karar (eski)'] != birlesik['Karar (yeni)'])
+    taranmadi = (~birlesik.index.isin(list(taranan)) if taranan is not None
+                 else np.zeros(len(birlesik), dtype=bool))
+    birlesik['Δ Skor'] = birlesik['Skor (yeni)'] - birlesik['Skor (eski)']
+    
+    birlesik['Değişim'] = pd.Categorical(
+        np.select([taranmadi, yeni_sinyal, kayboldu, karar_donusu, birlesik['Δ Skor'] != 0],
+                  [TARANMADI] + DEGISIM_TURLERI, default="—"),
+        categories=DEGISIM_TURLERI + ["—", TARANMADI])
+    birlesik['Karar'] = (birlesik['Karar (eski)'].fillna("—").astype(str) + " → "
+                         + birlesik['Karar (yeni)'].fillna("—").astype(str))
+    if sadece_degisenler:
+        birlesik = birlesik[birlesik['Değişim'].isin(DEGISIM_TURLERI)]
+    return (birlesik.reset_index()
+            .sort_values(['Değişim', 'Δ Skor'], key=lambda s: s.abs() if s.name == 'Δ Skor' else s,
+                         ascending=[True, False]))
+
+def tarama_karsilastir(eski, yeni, taranan=None):
+    """İki sonuç tablosunu hisse bazında karşılaştır (değişmeyenler dahil)"""
+    return tarama_farki(eski, yeni, taranan, sadece_degisenler=False)
+
+# Yeni oturumda bu portföyün son taramasını geri yükle (başka portföylerin taramaları yüklenmez)
+if OTOMATIK_GERI_YUKLE and parquet_destegi() and not st.session_state.get('geri_yukleme_denendi'):
+    st.session_state['geri_yukleme_denendi'] = True
+    if st.session_state['data'] is None:
+        try:
+            son_tarama = son_portfoy_taramasi(aktif_portfoy)
+            if son_tarama is not None:
+                taramayi_geri_yukle(son_tarama)
+        except Exception:
+            pass
 
 # --- ANA ARAYÜZ ---
 col1, col2, col3 = st.columns([2, 3, 1])
@@ -725,7 +2058,7 @@ with col3:
         st.rerun()
 
 # Bilgilendirme
-st.caption(f"💡 **BIST100 Tam Liste: {len(varsayilan_hisseler)} hisse** | Seçili: {len(secilen_hisseler)} | "
+st.caption(f"💡 **Hisse Evreni: {len(tum_hisseler)} hisse** | Seçili: {len(secilen_hisseler)} | "
           f"🔄 Otomatik yedekleme: Yahoo → RapidAPI → Investing.com")
 
 # --- TARAMA ---
@@ -733,21 +2066,178 @@ if start:
     if len(secilen_hisseler) == 0:
         st.warning("⚠️ Lütfen en az bir hisse seçin!")
     else:
-        with st.spinner(f"🔍 {len(secilen_hisseler)} hisse taranıyor... (Hybrid veri sistemi aktif)"):
-            st.session_state['data'] = verileri_getir(secilen_hisseler)
+        # Faz 1: toplu kotasyonla ön eleme
+        if on_eleme_aktif:
+            with st.spinner(f"🔎 Faz 1: {len(secilen_hisseler)} hisse ön elemeden geçiyor..."):
+                adaylar, elenen = on_eleme(secilen_hisseler, min_hacim_mn * 1_000_000, min_hareket)
+        else:
+            adaylar, elenen = list(secilen_hisseler), {'veri_yok': 0, 'likidite': 0, 'hareket': 0}
+        
+        # Faz 2: tam indikatör ve sinyal hesabı yalnızca kalanlarda
+        with st.spinner(f"🔍 Faz 2: {len(adaylar)} hisse taranıyor... (Hybrid veri sistemi aktif)"):
+            sonuc, panel = verileri_getir(adaylar) if adaylar else (pd.DataFrame(), pd.DataFrame())
+            st.session_state['onceki_data'] = st.session_state['data']
+            tarama_verisini_ayarla(sonuc)
+            # Yalnızca iki taramada da analiz edilen hisseler karşılaştırılır
+            onceki_taranan = st.session_state.get('taranan_hisseler')
+            st.session_state['taranan_hisseler'] = taranan_hisseler(panel)
+            if st.session_state['onceki_data'] is not None:
+                taranan = st.session_state['taranan_hisseler']
+                if onceki_taranan is not None:
+                    taranan = taranan & onceki_taranan
+                st.session_state['tarama_farki'] = tarama_farki(st.session_state['onceki_data'],
+                                                                st.session_state['data'], taranan)
+            st.session_state['gosterge_paneli'] = panel
+            try:
+                gostergeleri_kaydet(panel)
+            except Exception:
+                st.warning("⚠️ Son indikatör değerleri veritabanına yazılamadı")
+            st.session_state['tarama_ozeti'] = {
+                'evren': len(secilen_hisseler),
+                'faz1_elenen': elenen,
+                'faz2_aday': len(adaylar),
+                'faz2_elenen': len(adaylar) - len(st.session_state['data']),
+            }
             st.success("✅ Tarama tamamlandı!")
+        
+        if otomatik_kaydet and parquet_destegi():
+            try:
+                tarama_kaydet(st.session_state['data'], adaylar, {
+                    'rsi_alt': rsi_alt, 'rsi_ust': rsi_ust, 'atr_mult': atr_mult, 'bb_length': bb_length,
+                    'on_eleme': on_eleme_aktif, 'min_hacim_mn': min_hacim_mn, 'min_hareket': min_hareket,
+                })
+                st.session_state.pop('geri_yuklenen', None)
+            except Exception:
+                st.warning("⚠️ Tarama anlık görüntüsü kaydedilemedi")
+
+if st.session_state.get('geri_yuklenen'):
+    st.caption(f"♻️ {st.session_state['geri_yuklenen']} tarihli tarama anlık görüntüsünden geri yüklendi")
+
+if st.session_state.get('tarama_ozeti'):
+    ozet = st.session_state['tarama_ozeti']
+    faz1 = ozet['faz1_elenen']
+    st.caption(f"🧮 **Faz 1:** {ozet['evren']} hisseden {sum(faz1.values())} elendi "
+               f"(likidite: {faz1['likidite']}, hareket: {faz1['hareket']}, veri yok: {faz1['veri_yok']}) | "
+               f"**Faz 2:** {ozet['faz2_aday']} hisseden {ozet['faz2_elenen']} elendi (yetersiz veri/sinyal yok)")
+
+# --- PİYASA GENİŞLİĞİ (YAN PANEL) ---
+gosterge_paneli = st.session_state.get('gosterge_paneli')
+if gosterge_paneli is not None and not gosterge_paneli.empty:
+    sektorel, genel = piyasa_genisligi(gosterge_paneli)
+    with genislik_alani:
+        st.markdown(f"""
+        <div class="market-card">
+            <div class="market-label">PİYASA GENİŞLİĞİ ({int(genel['Hisse'])} hisse)</div>
+            <div class="market-value"><span class="up">▲ {int(genel['Yükselen'])}</span> / <span class="down">▼ {int(genel['Düşen'])}</span></div>
+            <div class="market-delta">SMA200 üstü: %{genel['SMA200 Üstü %']:.0f} | Ort. RSI: {genel['Ort. RSI']:.1f}</div>
+        </div>
+        """, unsafe_allow_html=True)
+        with st.expander("🏭 Sektör Görünümü", expanded=False):
+            st.dataframe(sektorel.sort_values('Hisse', ascending=False).round(1),
+                         use_container_width=True)
+
+# --- ANLIK GÖRÜNTÜLER ---
+with st.expander("💾 Tarama Anlık Görüntüleri", expanded=False):
+    if not parquet_destegi():
+        st.info("Anlık görüntüler için pyarrow kurulmalı (pip install pyarrow).")
+    elif not tarama_listesi():
+        st.caption("Henüz kayıtlı tarama yok.")
+    else:
+        kayitlar = tarama_listesi()
+        g1, g2 = st.columns([3, 1])
+        with g1:
+            secili_kayit = st.selectbox("Anlık görüntü:", kayitlar, key="snap_select")
+        with g2:
+            if st.button("♻️ Geri Yükle", use_container_width=True):
+                taramayi_geri_yukle(secili_kayit)
+                st.rerun()
+        
+        _, meta = tarama_yukle(secili_kayit)
+        st.caption(f"🕒 {meta['zaman']} | Portföy: {meta.get('portfoy', '-')} | {len(meta['semboller'])} hisse | "
+                   f"Parametreler: {meta['parametreler']}")
+        
+        panel_hisse = st.selectbox("İndikatör paneli:", meta['semboller'], key="snap_panel")
+        panel = panelleri_yukle(secili_kayit, panel_hisse)
+        if not panel.empty:
+            st.dataframe(panel.drop(columns='Hisse').tail(30), use_container_width=True, height=250)
+        
+        if len(kayitlar) > 1:
+            onceki_kayit = st.selectbox("Karşılaştır:", kayitlar[1:], key="snap_compare")
+            st.dataframe(tarama_karsilastir(tarama_yukle(onceki_kayit)[0], tarama_yukle(secili_kayit)[0],
+                                            kayit_taranan(onceki_kayit) & kayit_taranan(secili_kayit)),
+                         hide_index=True, use_container_width=True, height=300)
+
+# --- DEĞİŞİKLİKLER ---
+fark = st.session_state.get('tarama_farki')
+if fark is not None:
+    with st.expander(f"🔁 Değişiklikler ({len(fark)} hisse)", expanded=not fark.empty):
+        if fark.empty:
+            st.caption("Önceki taramaya göre değişiklik yok.")
+        else:
+            tur_sayilari = fark['Değişim'].value_counts()
+            for kolon, tur in zip(st.columns(len(DEGISIM_TURLERI)), DEGISIM_TURLERI):
+                kolon.metric(tur, int(tur_sayilari.get(tur, 0)))
+            st.dataframe(
+                fark,
+                column_order=("Değişim", "Hisse", "Karar", "Skor (eski)", "Skor (yeni)", "Δ Skor"),
+                column_config={
+                    "Δ Skor": st.column_config.NumberColumn("Δ Skor", format="%+d"),
+                },
+                hide_index=True,
+                use_container_width=True,
+                height=min(400, 38 + 35 * len(fark))
+            )
+
+# --- EKRAN OLUŞTURUCU ---
+# URL ile de çalışır: ?ekran=RSI<30 and ADX>25&sirala=adx&limit=50
+if 'ekran_ifadesi' not in st.session_state:
+    st.session_state['ekran_ifadesi'] = st.query_params.get("ekran", "")
+
+def hazir_ekran_secildi():
+    if st.session_state['ekran_hazir'] in HAZIR_EKRANLAR:
+        st.session_state['ekran_ifadesi'] = HAZIR_EKRANLAR[st.session_state['ekran_hazir']]
+
+with st.expander("🧮 Ekran Oluşturucu (son indikatör kaydı)", expanded="ekran" in st.query_params):
+    e1, e2, e3, e4 = st.columns([2, 4, 1, 1])
+    with e1:
+        st.selectbox("Hazır ekran:", ["—"] + list(HAZIR_EKRANLAR), key="ekran_hazir", on_change=hazir_ekran_secildi)
+    with e2:
+        ekran_ifadesi = st.text_input("İfade:", key="ekran_ifadesi",
+                                      placeholder="RSI < 30 and ADX > 25 and fiyat > SMA_200")
+    with e3:
+        varsayilan_siralama = st.query_params.get("sirala", "skor")
+        ekran_siralama = st.selectbox("Sırala:", EKRAN_KOLONLARI, key="ekran_sirala",
+                                      index=EKRAN_KOLONLARI.index(varsayilan_siralama)
+                                      if varsayilan_siralama in EKRAN_KOLONLARI else EKRAN_KOLONLARI.index("skor"))
+    with e4:
+        ekran_limit = st.number_input("Limit:", min_value=1, max_value=1000, key="ekran_limit",
+                                      value=int(st.query_params.get("limit", 200))
+                                      if str(st.query_params.get("limit", "")).isdigit() else 200)
+    st.caption(f"Kolonlar: {', '.join(EKRAN_KOLONLARI)} | Bağlaçlar: and/or/not (ve/veya/değil), in, + - * /")
+    
+    if ekran_ifadesi.strip():
+        try:
+            ekran_sonucu, ekran_suresi = ekran_calistir(ekran_ifadesi, ekran_siralama, limit=ekran_limit)
+            kayit_sayisi = db_oku("SELECT COUNT(*) AS n, MAX(zaman) AS son FROM son_indikatorler").iloc[0]
+            st.caption(f"✅ {len(ekran_sonucu)} hisse | {ekran_suresi * 1000:.1f} ms | "
+                       f"Kayıtlı: {kayit_sayisi['n']} hisse, son tarama {kayit_sayisi['son'] or '-'}")
+            st.dataframe(ekran_sonucu, hide_index=True, use_container_width=True,
+                         height=min(400, 38 + 35 * max(len(ekran_sonucu), 1)))
+            # Paylaşılabilir URL
+            st.query_params.update({"ekran": ekran_ifadesi, "sirala": ekran_siralama, "limit": str(ekran_limit)})
+        except ValueError as e:
+            st.error(f"⚠️ {e}")
 
 # --- SONUÇLAR ---
 if st.session_state['data'] is not None and not st.session_state['data'].empty:
-    df_final = st.session_state['data'].sort_values(by="Skor", ascending=False)
+    df_final = st.session_state['data']  # tarama sırasında skora göre sıralandı
+    sayilar = st.session_state['karar_sayilari']
     
     # Metrikler
     col1, col2, col3, col4 = st.columns(4)
     
-    guclu_al = len(df_final[df_final['Karar'].str.contains("GÜÇLÜ AL")])
-    al = len(df_final[df_final['Karar'].str.contains("AL")])
-    sat = len(df_final[df_final['Karar'].str.contains("SAT")])
-    izle = len(df_final[df_final['Karar'].str.contains("İZLE")])
+    guclu_al, al, sat, izle = (sum(sayilar[k] for k in KARAR_GRUPLARI[g])
+                               for g in ('guclu_al', 'al', 'sat', 'izle'))
     
     col1.metric("🚀 Güçlü Alım", guclu_al)
     col2.metric("🟢 Alım", al)
@@ -764,9 +2254,35 @@ if st.session_state['data'] is not None and not st.session_state['data'].empty:
         </div>
         """, unsafe_allow_html=True)
     
+    # Filtre / sıralama / sayfalama
+    with st.expander("🔎 Filtrele & Sırala", expanded=False):
+        f1, f2, f3 = st.columns(3)
+        with f1:
+            filtre_karar = st.multiselect("Karar:", [k for k in KARARLAR if sayilar[k] > 0], key="flt_karar")
+            filtre_portfoy = st.radio("Portföy:", ["Tümü", "Portföyde", "Portföy dışı"],
+                                      horizontal=True, key="flt_portfoy")
+        with f2:
+            skor_min, skor_max = int(df_final['Skor'].min()), int(df_final['Skor'].max())
+            filtre_skor = (st.slider("Skor:", skor_min, skor_max, (skor_min, skor_max), key="flt_skor")
+                           if skor_min < skor_max else (skor_min, skor_max))
+            filtre_rsi = st.slider("RSI Bandı:", 0.0, 100.0, (0.0, 100.0), key="flt_rsi")
+        with f3:
+            sirala_kolon = st.selectbox("Sırala:", ["Skor", "RSI", "Fiyat", "Hisse"], key="flt_sort")
+            sirala_artan = st.checkbox("Artan", value=False, key="flt_asc")
+            sayfa_boyutu = st.selectbox("Sayfa boyutu:", [25, 50, 100, 250], index=1, key="flt_page_size")
+    
+    secili = sonuc_filtrele(df_final, filtre_karar, filtre_skor, filtre_rsi, filtre_portfoy,
+                            sirala_kolon, sirala_artan)
+    toplam_satir = len(secili)
+    sayfa_sayisi = max(1, -(-toplam_satir // sayfa_boyutu))
+    sayfa = st.number_input(f"Sayfa (1-{sayfa_sayisi}):", min_value=1, max_value=sayfa_sayisi,
+                            value=1, key="flt_page") if sayfa_sayisi > 1 else 1
+    df_sayfa = df_final.iloc[secili[(sayfa - 1) * sayfa_boyutu:sayfa * sayfa_boyutu]]
+    st.caption(f"📄 {toplam_satir} / {len(df_final)} satır | Sayfa {sayfa}/{sayfa_sayisi}")
+    
     # Tablo
     st.dataframe(
-        df_final,
+        df_sayfa,
         column_order=("Hisse", "Fiyat", "RSI", "Skor", "Sinyaller", "Karar", "AI Yorum", 
                      "Stop-Loss", "Hedef 1:2", "Hedef 1:3"),
         column_config={
@@ -778,6 +2294,7 @@ if st.session_state['data'] is not None and not st.session_state['data'].empty:
             "Hedef 1:2": st.column_config.NumberColumn("🎯 Hedef 1", format="%.2f ₺"),
             "Hedef 1:3": st.column_config.NumberColumn("🎯 Hedef 2", format="%.2f ₺"),
         },
+        hide_index=True,
         use_container_width=True,
         height=400
     )
@@ -786,7 +2303,7 @@ if st.session_state['data'] is not None and not st.session_state['data'].empty:
     st.divider()
     st.subheader("💼 Portföye Ekle")
     
-    col1, col2, col3, col4 = st.columns([2, 1, 1, 1])
+    col1, col2, col3, col4, col5 = st.columns([2, 1, 1, 1, 1])
     with col1:
         secili_hisse = st.selectbox("Hisse Seç:", df_final['Hisse'].unique(), key="add_stock")
     with col2:
@@ -799,8 +2316,11 @@ if st.session_state['data'] is not None and not st.session_state['data'].empty:
             key="add_price"
         )
     with col4:
+        alis_tarihi = st.date_input("Alış Tarihi:", value=datetime.now().date(),
+                                    max_value=datetime.now().date(), key="add_date")
+    with col5:
         if st.button("➕ EKLE", type="primary", use_container_width=True):
-            portfoy_ekle(secili_hisse, adet, alis_fiyati)
+            portfoy_ekle(secili_hisse, adet, alis_fiyati, tarih=f"{alis_tarihi:%Y-%m-%d} {datetime.now():%H:%M}")
             st.success(f"✅ {secili_hisse} portföye eklendi!")
             st.rerun()
     
@@ -810,6 +2330,8 @@ if st.session_state['data'] is not None and not st.session_state['data'].empty:
     st.subheader("📊 Detaylı Grafik Analizi")
     
     vade_map = {"1 Hafta": "5d", "1 Ay": "1mo", "3 Ay": "3mo", "6 Ay": "6mo", "1 Yıl": "1y"}
+    vade_ofseti = {"1mo": pd.DateOffset(months=1), "3mo": pd.DateOffset(months=3),
+                   "6mo": pd.DateOffset(months=6), "1y": pd.DateOffset(years=1)}
     
     col_sel, col_radio = st.columns([1, 2])
     with col_sel:
@@ -822,17 +2344,30 @@ if st.session_state['data'] is not None and not st.session_state['data'].empty:
         interval_val = "60m" if period_val == "5d" else "1d"
         
         with st.spinner("📈 Grafik yükleniyor..."):
-            df_chart, chart_source = hybrid_data_fetch(selected+".IS", period=period_val, interval=interval_val)
+            chart_symbol = selected + ".IS"
+            # Günlük vadeler taramanın 1 yıllık çerçevesini ve indikatörlerini paylaşır
+            chart_period = "1y" if interval_val == "1d" else period_val
+            df_chart, chart_source = fiyat_gecmisi(chart_symbol, period=chart_period, interval=interval_val)
             
             if df_chart is not None and not df_chart.empty:
-                df_chart['SMA_20'] = df_chart['Close'].rolling(window=20).mean()
-                df_chart['SMA_50'] = df_chart['Close'].rolling(window=50).mean()
+                def chart_ind(ad, **parametreler):
+                    return indikator_al(chart_symbol, interval_val, df_chart, ad, **parametreler)
+                
+                sma_20 = chart_ind("SMA", length=20)
+                sma_50 = chart_ind("SMA", length=50)
+                bb = chart_ind("BBANDS", length=20, std=2)
+                rsi_seri = chart_ind("RSI", length=14)
                 
-                bb = df_chart.ta.bbands(length=20, std=2)
+                # Paylaşılan önbellek çerçevesini değiştirmemek için kopya üzerinde çalış
+                df_chart = df_chart.copy()
+                df_chart['SMA_20'] = sma_20 if sma_20 is not None else float('nan')
+                df_chart['SMA_50'] = sma_50 if sma_50 is not None else float('nan')
                 if bb is not None:
                     df_chart = pd.concat([df_chart, bb], axis=1)
+                df_chart['RSI'] = rsi_seri if rsi_seri is not None else float('nan')
                 
-                df_chart['RSI'] = df_chart.ta.rsi(length=14)
+                if period_val in vade_ofseti:
+                    df_chart = df_chart.loc[df_chart.index >= df_chart.index[-1] - vade_ofseti[period_val]]
                 
                 # Grafik
                 fig = make_subplots(
@@ -1012,12 +2547,231 @@ else:
     else:
         st.info("👆 Taramaya başlamak için yukarıdaki butona tıklayın.")
 
+# --- REPLAY (SİMÜLASYON) ---
+REPLAY_MIN_BAR = 100  # tarama_akisi'nın istediği en kısa geçmiş
+
+def replay_verisi(kaynak):
+    """Replay için depolanmış günlük barlar: anlık görüntü panelleri ya da fiyat önbelleği"""
+    ohlcv = ['Open', 'High', 'Low', 'Close', 'Volume']
+    if kaynak == "Fiyat önbelleği":
+        return {anahtar[0]: kayit[0][ohlcv] for anahtar, kayit in fiyat_kayitlari()
+                if anahtar[1:] == ("1y", "1d")}
+    return {symbol: panel[ohlcv] for symbol, panel in panelleri_yukle(kaynak).groupby('Hisse')}
+
+def replay_takvimi(veriler):
+    """Depolanmış barların birleşik işlem günü takvimi"""
+    return sorted(set().union(*(df.index for df in veriler.values()))) if veriler else []
+
+def replay_calistir(veriler, hiz, baslangic_bar, adim_sayisi, tik_sonrasi=None):
+    """
+    Depolanmış barları hybrid_data_fetch yolundan simüle saatle besle; her tikte
+    tarama akışını (toplu çekirdek yolu dahil) çalıştır, gecikme ve verimi ölç.
+    hiz: işlem günü/saniye (0 = beklemesiz yük testi). İndikatörler replay'e özel
+    önbellekte tutulur, ortak önbelleğe yazılmaz.
+    Sınır: her tik tam bir yeniden taramadır. Çekirdekler tüm seriyi baştan işler ve
+    veri sürümü her yeni barla değiştiğinden önceki tikin sonuçları yeniden kullanılamaz;
+    ölçülen gecikme artımlı güncellemeyi değil tam taramayı gösterir.
+    """
+    takvim = replay_takvimi(veriler)
+    semboller = list(veriler)
+    olcumler = []
+    veri_ayarlari['replay'] = {'veriler': veriler, 'saat': None,
+                               'onbellek': {'kilit': threading.Lock(), 'veri': OrderedDict()}}
+    try:
+        for saat in takvim[baslangic_bar:baslangic_bar + adim_sayisi]:
+            t0 = time.perf_counter()
+            veri_ayarlari['replay']['saat'] = saat
+            # Önceki tikin anahtarları (veri sürümü değişti) bir daha kullanılmaz; bellek
+            # tik başına bir taramayla sınırlı kalsın diye temizlenir
+            veri_ayarlari['replay']['onbellek']['veri'].clear()
+            
+            satirlar = []
+            portfoy_degeri = 0.0
+            for _, _, satir, gosterge in tarama_akisi(semboller, {}):
+                if gosterge['Hisse'] in st.session_state['portfolio']:
+                    portfoy_degeri += gosterge['Kapanış'] * st.session_state['portfolio'][gosterge['Hisse']]['adet']
+                if satir is not None:
+                    satirlar.append(satir)
+            sonuc, sayilar = sonuclari_hazirla(pd.DataFrame(satirlar))
+            
+            gecen = time.perf_counter() - t0
+            olcumler.append({
+                'Tarih': saat,
+                'Gecikme (ms)': gecen * 1000,
+                'Hisse/sn': len(semboller) / gecen if gecen > 0 else 0,
+                'Sinyal': len(sonuc),
+                'Alım': sum(sayilar[k] for k in KARAR_GRUPLARI['al']),
+                'Satım': sum(sayilar[k] for k in KARAR_GRUPLARI['sat']),
+                'Portföy Değeri': portfoy_degeri,
+            })
+            if tik_sonrasi:
+                tik_sonrasi(pd.DataFrame(olcumler), sonuc)
+            if hiz > 0:
+                time.sleep(max(0.0, 1 / hiz - gecen))
+    finally:
+        veri_ayarlari['replay'] = None
+    return pd.DataFrame(olcumler)
+
+def replay_ozeti(olcumler, toplam_sn):
+    """Replay yük testi özeti: tik sayısı, gecikme dağılımı ve verim"""
+    gecikme = olcumler['Gecikme (ms)'].to_numpy()
+    return {
+        'Tik': len(olcumler),
+        'Ort. gecikme (ms)': float(gecikme.mean()),
+        'p95 gecikme (ms)': float(np.percentile(gecikme, 95)),
+        'Maks. gecikme (ms)': float(gecikme.max()),
+        'Verim (hisse/sn)': float(olcumler['Hisse/sn'].mean()),
+        'Süre (sn)': toplam_sn,
+    }
+
+with st.expander("⏯️ Replay (Simülasyon / Yük Testi)", expanded=False):
+    replay_kaynaklari = (tarama_listesi() if parquet_destegi() else []) + ["Fiyat önbelleği"]
+    r1, r2, r3, r4 = st.columns(4)
+    with r1:
+        replay_kaynak = st.selectbox("Bar kaynağı:", replay_kaynaklari, key="replay_source")
+    with r2:
+        replay_hiz = st.number_input("Hız (gün/sn, 0=maks):", min_value=0.0, max_value=100.0,
+                                     value=1.0, step=0.5, key="replay_speed")
+    veriler = replay_verisi(replay_kaynak)
+    bar_sayisi = len(replay_takvimi(veriler))
+    # Başlangıç barı kaynağın uzunluğuna göre sınırlanır (en az bir tik kalsın)
+    son_baslangic = max(REPLAY_MIN_BAR, bar_sayisi - 1)
+    st.session_state['replay_start'] = min(st.session_state.get('replay_start', 150), son_baslangic)
+    with r3:
+        replay_bas = st.number_input("Başlangıç barı:", min_value=REPLAY_MIN_BAR, max_value=son_baslangic,
+                                     key="replay_start")
+    with r4:
+        replay_adim = st.number_input("Tik sayısı:", min_value=1, max_value=250, value=20, key="replay_steps")
+    
+    replay_mumkun = bar_sayisi > REPLAY_MIN_BAR
+    if not veriler:
+        st.warning("⚠️ Seçilen kaynakta depolanmış bar yok. Önce bir tarama çalıştırın.")
+    elif not replay_mumkun:
+        st.warning(f"⚠️ Seçilen kaynakta {bar_sayisi} işlem günü var; replay için en az "
+                   f"{REPLAY_MIN_BAR + 1} gün gerekir.")
+    else:
+        st.caption(f"📅 {bar_sayisi} işlem günü | {len(veriler)} hisse | "
+                   f"Çalıştırılacak tik: {min(int(replay_adim), bar_sayisi - int(replay_bas))} | "
+                   f"Her tik tüm indikatörleri baştan hesaplar")
+    
+    if st.button("▶️ Replay Başlat", use_container_width=True, disabled=not replay_mumkun):
+        canli_metrik = st.empty()
+        canli_grafik = st.empty()
+        canli_tablo = st.empty()
+        
+        def tik_sonrasi(olcumler, sonuc):
+            son = olcumler.iloc[-1]
+            canli_metrik.caption(f"🕒 {son['Tarih']:%Y-%m-%d} | Tik {len(olcumler)}/{replay_adim} | "
+                                 f"{son['Gecikme (ms)']:.0f} ms | {son['Hisse/sn']:.0f} hisse/sn | "
+                                 f"Sinyal: {son['Sinyal']} | Portföy: {son['Portföy Değeri']:,.2f} ₺")
+            canli_grafik.line_chart(olcumler.set_index('Tarih')[['Gecikme (ms)']], height=150)
+            canli_tablo.dataframe(sonuc.head(10), hide_index=True, use_container_width=True)
+        
+        t0 = time.perf_counter()
+        olcumler = replay_calistir(veriler, replay_hiz, int(replay_bas), int(replay_adim), tik_sonrasi)
+        if olcumler.empty:
+            st.warning("⚠️ Seçilen başlangıç barından sonra tik yok.")
+        else:
+            st.session_state['replay_raporu'] = replay_ozeti(olcumler, time.perf_counter() - t0)
+    
+    if st.session_state.get('replay_raporu'):
+        st.caption("Son replay raporu")
+        st.dataframe(pd.DataFrame([st.session_state['replay_raporu']]).round(1),
+                     hide_index=True, use_container_width=True)
+
+# --- SİSTEM & PERFORMANS ---
+def baslangic_raporu_kaydet(olcum):
+    """İlk çizim ölçümünü açılış günlüğüne ekle (açılış gerilemelerini izlemek için)"""
+    try:
+        os.makedirs(ONBELLEK_DIZINI, exist_ok=True)
+        with open(os.path.join(ONBELLEK_DIZINI, "baslangic.log"), "a") as f:
+            f.write(json.dumps({
+                'zaman': datetime.now().isoformat(timespec="seconds"),
+                'tembel_import': TEMBEL_IMPORT,
+                'ilk_cizim_ms': round(olcum['ilk_cizim'] * 1000, 1),
+                'importlar_ms': {ad: round(sn * 1000, 1) for ad, sn in olcum['importlar'].items()},
+                'isitma': {ad: round(deger, 4) for ad, deger in olcum['isitma'].items()},
+            }) + "\n")
+    except Exception:
+        pass
+
+def baslangic_gecmisi(adet=10):
+    """Son açılışların ilk çizim ölçümleri"""
+    try:
+        with open(os.path.join(ONBELLEK_DIZINI, "baslangic.log")) as f:
+            satirlar = f.readlines()[-adet:]
+        return pd.DataFrame([json.loads(satir) for satir in satirlar])
+    except Exception:
+        return pd.DataFrame()
+
+with st.expander("🛠️ Sistem & Performans", expanded=False):
+    olcum = baslangic_olcumleri()
+    st.markdown("**⏱️ Başlangıç Raporu**")
+    p1, p2, p3 = st.columns(3)
+    p1.metric("İlk çizim (soğuk)", f"{olcum['ilk_cizim'] * 1000:.0f} ms" if olcum['ilk_cizim'] else "-")
+    p2.metric("Son çalıştırma", f"{olcum['son_calisma'] * 1000:.0f} ms" if olcum['son_calisma'] else "-")
+    p3.metric("Isıtılan fiyat kaydı", olcum['isitma'].get('fiyat_kayit', 0))
+    st.dataframe(pd.DataFrame({
+        'Modül': AGIR_MODULLER,
+        'Yüklendi': [ad in sys.modules for ad in AGIR_MODULLER],
+        'Import (ms)': [round(olcum['importlar'][ad] * 1000, 1) if ad in olcum['importlar'] else None
+                        for ad in AGIR_MODULLER],
+    }), hide_index=True, use_container_width=True)
+    isitma = olcum['isitma']
+    st.caption(f"Tembel import: {'açık' if TEMBEL_IMPORT else 'kapalı'} | "
+               f"Isıtma: {isitma.get('fiyat_kayit', 0)} fiyat kaydı {isitma.get('fiyat_sn', 0) * 1000:.0f} ms, "
+               f"{isitma.get('indikator_hisse', 0)} hisse indikatörü {isitma.get('indikator_sn', 0) * 1000:.0f} ms")
+    st.divider()
+    st.markdown("**📡 Kaynak Gecikmeleri & Hedge**")
+    histogram = gecikme_histogrami()
+    if not histogram.empty:
+        st.dataframe(histogram.round(1), hide_index=True, use_container_width=True)
+    hedge_ist = kaynak_gecikmeleri()['hedge']
+    st.caption(f"Hedged istek: {hedge_ist['istek']} | Paralel yedek gönderilen: {hedge_ist['hedge']} | "
+               f"Kazananlar: {hedge_ist['kazanan']}")
+    
+    st.divider()
+    st.markdown("**⚙️ Hızlandırılmış Çekirdekler**")
+    cekirdekler = hizli_cekirdekler()
+    st.caption(f"numba: {'aktif' if cekirdekler is not None else 'kapalı (pandas yolu)'} | "
+               f"Arka plan derleme: {isitma.get('jit_derleme_sn', 0):.1f} sn | "
+               f"Hızlandırılan: {', '.join(ad for ad, tanim in INDIKATORLER.items() if 'hizli' in tanim)}")
+    if st.button("🧪 Çekirdek Doğrulama & Benchmark", use_container_width=True, disabled=cekirdekler is None):
+        gunlukler = {anahtar[0]: kayit[0] for anahtar, kayit in fiyat_kayitlari()
+                     if anahtar[2] == "1d" and kayit[0] is not None and len(kayit[0]) >= 100}
+        with st.spinner("Çekirdekler pandas yoluyla karşılaştırılıyor..."):
+            karsilastirma = cekirdek_karsilastir(gunlukler if len(gunlukler) >= 20 else sentetik_cerceveler())
+        st.caption(f"{len(gunlukler) if len(gunlukler) >= 20 else 'Sentetik 100'} hisse ile")
+        st.dataframe(karsilastirma, hide_index=True, use_container_width=True)
+    
+    st.divider()
+    st.markdown("**🛬 Tek Uçuş (istek birleştirme)**")
+    ucus_ist = ucustaki_istekler()['istatistik']
+    u1, u2, u3, u4 = st.columns(4)
+    u1.metric("İstek", ucus_ist['istek'])
+    u2.metric("Upstream çağrı", ucus_ist['upstream'])
+    u3.metric("Birleştirilen", ucus_ist['birlesen'],
+              f"%{ucus_ist['birlesen'] / ucus_ist['istek'] * 100:.0f}" if ucus_ist['istek'] else None)
+    u4.metric("En kalabalık uçuş", ucus_ist['en_kalabalik'])
+    
+    gecmis = baslangic_gecmisi()
+    if not gecmis.empty:
+        st.caption("Son açılışlar")
+        st.dataframe(gecmis[['zaman', 'tembel_import', 'ilk_cizim_ms']], hide_index=True, use_container_width=True)
+
 # Footer
 st.divider()
 st.markdown(f"""
 <div style='text-align: center; color: #666; padding: 20px;'>
     <p><strong>BIST100 PRO TRADER</strong> | Hybrid Veri Sistemi {source_badges.get(st.session_state['data_source'], '')}</p>
     <p style='font-size: 12px;'>⚠️ Bu uygulama yatırım tavsiyesi değildir. Kararlar kendi sorumluluğunuzdadır.</p>
-    <p style='font-size: 11px; margin-top: 10px;'>📊 BIST100 Tam Liste: {len(varsayilan_hisseler)} Hisse | 🔄 Otomatik Yedekleme Aktif</p>
+    <p style='font-size: 11px; margin-top: 10px;'>📊 Hisse Evreni: {len(tum_hisseler)} Hisse | 🔄 Otomatik Yedekleme Aktif</p>
 </div>
 """, unsafe_allow_html=True)
+
+# Çalıştırma süresi (ilk çalıştırma = sürecin ilk çizimi)
+olcum = baslangic_olcumleri()
+olcum['son_calisma'] = time.perf_counter() - BASLANGIC
+if olcum['ilk_cizim'] is None:
+    olcum['ilk_cizim'] = olcum['son_calisma']
+    baslangic_raporu_kaydet(olcum)
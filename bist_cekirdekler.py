@@ -0,0 +1,275 @@
+"""
+BIST100 PRO - yol bağımlı indikatörler için numba çekirdekleri.
+
+Wilder RMA ile RSI/ATR/ADX, EMA tabanlı MACD, stokastik yumuşatma ve yutan/çekiç
+formasyonları. Girdiler (bar x hisse) 2B float64 dizileridir, hisse ekseni paralel
+döner; kısa geçmişlerin başı NaN ile doldurulabilir. Çekirdekler modül düzeyinde
+cache=True ile derlenir, sonraki açılışlar derlenmiş kodu diskten yükler.
+
+Mum formasyonlarının TA-Lib kurallarıyla yazılmış pandas karşılıkları da buradadır;
+çekirdek yolu ve pandas yolu TA-Lib kurulu olmasa da aynı sinyali üretir.
+numba kurulu değilse çekirdekler saf Python olarak çalışır (testler için).
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+if numba is not None:
+    if "NUMBA_THREADING_LAYER" not in os.environ:
+        # TBB katmanı ana olmayan iş parçacığından (Streamlit oturumları) çağrılınca
+        # süreç kapanışında takılıyor; her yerde bulunan workqueue kullanılır
+        numba.config.THREADING_LAYER = 'workqueue'
+    prange = numba.prange
+    jit = numba.njit(error_model='numpy', cache=True)
+    pjit = numba.njit(error_model='numpy', cache=True, parallel=True)
+else:
+    prange = range
+    jit = pjit = lambda fonksiyon: fonksiyon
+
+
+@jit
+def ilk_gecerli(x):
+    for i in range(x.shape[0]):
+        if not np.isnan(x[i]):
+            return i
+    return x.shape[0]
+
+
+@jit
+def rma(x, n, out):
+    # pandas ewm(alpha=1/n, adjust=True, min_periods=n) - pandas_ta rma
+    beta = 1.0 - 1.0 / n
+    pay = payda = 0.0
+    gozlem = 0
+    for i in range(x.shape[0]):
+        if not np.isnan(x[i]):
+            pay = beta * pay + x[i]
+            payda = beta * payda + 1.0
+            gozlem += 1
+        elif gozlem > 0:
+            pay *= beta
+            payda *= beta
+        out[i] = pay / payda if gozlem >= n else np.nan
+
+
+@jit
+def ema(x, n, out):
+    # pandas_ta ema: ilk n barın (NaN'lar hariç) ortalaması tohum, sonra ewm(span=n, adjust=False).
+    # ewm gibi NaN girdi son değeri taşır; boşluk sonrası eski değerin ağırlığı boşluk kadar azalır
+    out[:] = np.nan
+    f = ilk_gecerli(x)
+    if x.shape[0] - f < n:
+        return
+    alfa = 2.0 / (n + 1)
+    toplam = 0.0
+    adet = 0
+    for i in range(f, f + n):
+        if not np.isnan(x[i]):
+            toplam += x[i]
+            adet += 1
+    deger = toplam / adet
+    out[f + n - 1] = deger
+    agirlik = 1.0
+    for i in range(f + n, x.shape[0]):
+        agirlik *= 1.0 - alfa
+        if not np.isnan(x[i]):
+            deger = (agirlik * deger + alfa * x[i]) / (agirlik + alfa)
+            agirlik = 1.0
+        out[i] = deger
+
+
+@jit
+def sma(x, n, out):
+    out[:] = np.nan
+    f = ilk_gecerli(x)
+    for i in range(f + n - 1, x.shape[0]):
+        out[i] = x[i - n + 1:i + 1].mean()
+
+
+@jit
+def gercek_aralik(h, l, c, out):
+    out[:] = np.nan
+    for i in range(ilk_gecerli(c) + 1, c.shape[0]):
+        out[i] = max(h[i] - l[i], abs(h[i] - c[i - 1]), abs(l[i] - c[i - 1]))
+
+
+@pjit
+def rsi(c, n):
+    out = np.empty(c.shape)
+    for j in prange(c.shape[1]):
+        artis = np.full(c.shape[0], np.nan)
+        azalis = np.full(c.shape[0], np.nan)
+        for i in range(ilk_gecerli(c[:, j]) + 1, c.shape[0]):
+            artis[i] = max(c[i, j] - c[i - 1, j], 0.0)
+            azalis[i] = max(c[i - 1, j] - c[i, j], 0.0)
+        ort_artis = np.empty(c.shape[0])
+        ort_azalis = np.empty(c.shape[0])
+        rma(artis, n, ort_artis)
+        rma(azalis, n, ort_azalis)
+        out[:, j] = 100.0 * ort_artis / (ort_artis + ort_azalis)
+    return out
+
+
+@pjit
+def atr(h, l, c, n):
+    out = np.empty(c.shape)
+    for j in prange(c.shape[1]):
+        tr = np.empty(c.shape[0])
+        gercek_aralik(h[:, j], l[:, j], c[:, j], tr)
+        rma(tr, n, out[:, j])
+    return out
+
+
+@pjit
+def adx(h, l, c, n):
+    adx_ = np.empty(c.shape)
+    dmp = np.empty(c.shape)
+    dmn = np.empty(c.shape)
+    for j in prange(c.shape[1]):
+        m = c.shape[0]
+        tr = np.empty(m)
+        atr_ = np.empty(m)
+        gercek_aralik(h[:, j], l[:, j], c[:, j], tr)
+        rma(tr, n, atr_)
+        arti = np.full(m, np.nan)
+        eksi = np.full(m, np.nan)
+        for i in range(ilk_gecerli(c[:, j]) + 1, m):
+            yukari = h[i, j] - h[i - 1, j]
+            asagi = l[i - 1, j] - l[i, j]
+            arti[i] = yukari if yukari > asagi and yukari > 0 else 0.0
+            eksi[i] = asagi if asagi > yukari and asagi > 0 else 0.0
+        gecici = np.empty(m)
+        rma(arti, n, gecici)
+        dmp[:, j] = 100.0 * gecici / atr_
+        rma(eksi, n, gecici)
+        dmn[:, j] = 100.0 * gecici / atr_
+        dx = 100.0 * np.abs(dmp[:, j] - dmn[:, j]) / (dmp[:, j] + dmn[:, j])
+        rma(dx, n, adx_[:, j])
+    return adx_, dmp, dmn
+
+
+@pjit
+def macd(c, hizli, yavas, sinyal):
+    macd_ = np.empty(c.shape)
+    sinyal_ = np.empty(c.shape)
+    for j in prange(c.shape[1]):
+        kisa = np.empty(c.shape[0])
+        uzun = np.empty(c.shape[0])
+        ema(c[:, j], hizli, kisa)
+        ema(c[:, j], yavas, uzun)
+        macd_[:, j] = kisa - uzun
+        ema(macd_[:, j], sinyal, sinyal_[:, j])
+    return macd_, macd_ - sinyal_, sinyal_
+
+
+@pjit
+def stoch(h, l, c, k, d, yumusatma):
+    k_ = np.empty(c.shape)
+    d_ = np.empty(c.shape)
+    for j in prange(c.shape[1]):
+        m = c.shape[0]
+        pay = np.full(m, np.nan)
+        aralik = np.full(m, np.nan)
+        for i in range(ilk_gecerli(c[:, j]) + k - 1, m):
+            en_dusuk = l[i - k + 1:i + 1, j].min()
+            pay[i] = c[i, j] - en_dusuk
+            aralik[i] = h[i - k + 1:i + 1, j].max() - en_dusuk
+        # pandas_ta non_zero_range: aralıkta sıfır varsa tümüne epsilon eklenir
+        if np.any(aralik == 0.0):
+            aralik += np.finfo(np.float64).eps
+        sma(100.0 * pay / aralik, yumusatma, k_[:, j])
+        sma(k_[:, j], d, d_[:, j])
+    return k_, d_
+
+
+@pjit
+def yutan(o, h, l, c):
+    # TA-Lib CDLENGULFING (geriye bakış 2 bar); açılış/kapanış eşitliğiyle yutma ±80
+    out = np.zeros(c.shape)
+    for j in prange(c.shape[1]):
+        for i in range(ilk_gecerli(c[:, j]) + 2, c.shape[0]):
+            renk = 1 if c[i, j] >= o[i, j] else -1
+            onceki = 1 if c[i - 1, j] >= o[i - 1, j] else -1
+            if ((renk == 1 and onceki == -1
+                 and ((c[i, j] >= o[i - 1, j] and o[i, j] < c[i - 1, j])
+                      or (c[i, j] > o[i - 1, j] and o[i, j] <= c[i - 1, j]))) or
+                    (renk == -1 and onceki == 1
+                     and ((o[i, j] >= c[i - 1, j] and c[i, j] < o[i - 1, j])
+                          or (o[i, j] > c[i - 1, j] and c[i, j] <= o[i - 1, j])))):
+                tam = o[i, j] != c[i - 1, j] and c[i, j] != o[i - 1, j]
+                out[i, j] = (100.0 if tam else 80.0) * renk
+    return out
+
+
+@pjit
+def cekic(o, h, l, c):
+    # TA-Lib CDLHAMMER, varsayılan mum ayarları: kısa gövde (10 bar ort.), uzun alt gölge
+    # (gövdeden büyük), çok kısa üst gölge (10 bar aralık ort. x 0.1), yakın (5 bar x 0.2)
+    out = np.zeros(c.shape)
+    for j in prange(c.shape[1]):
+        for i in range(ilk_gecerli(c[:, j]) + 11, c.shape[0]):
+            govde_ort = np.abs(c[i - 10:i, j] - o[i - 10:i, j]).mean()
+            aralik_ort = (h[i - 10:i, j] - l[i - 10:i, j]).mean()
+            yakin_ort = (h[i - 6:i - 1, j] - l[i - 6:i - 1, j]).mean()
+            govde = abs(c[i, j] - o[i, j])
+            alt_govde = min(c[i, j], o[i, j])
+            if (govde < govde_ort and alt_govde - l[i, j] > govde
+                    and h[i, j] - max(c[i, j], o[i, j]) < 0.1 * aralik_ort
+                    and alt_govde <= l[i - 1, j] + 0.2 * yakin_ort):
+                out[i, j] = 100.0
+    return out
+
+
+# --- MUM FORMASYONLARI (PANDAS) ---
+def yutan_formasyonu(df):
+    """TA-Lib CDLENGULFING kuralları: beyaz siyahı yutarsa +100, siyah beyazı yutarsa -100 (eşitlikte ±80)"""
+    o, c = df['Open'], df['Close']
+    o1, c1 = o.shift(1), c.shift(1)
+    renk = np.where(c >= o, 1, -1)
+    onceki = np.where(c1 >= o1, 1, -1)
+    beyaz = (renk == 1) & (onceki == -1) & (((c >= o1) & (o < c1)) | ((c > o1) & (o <= c1)))
+    siyah = (renk == -1) & (onceki == 1) & (((o >= c1) & (c < o1)) | ((o > c1) & (c <= o1)))
+    tam = (o != c1) & (c != o1)
+    deger = np.where(beyaz | siyah, np.where(tam, 100.0, 80.0) * renk, 0.0)
+    deger[:2] = 0.0
+    return pd.DataFrame({'CDL_ENGULFING': deger}, index=df.index)
+
+
+def cekic_formasyonu(df):
+    """TA-Lib CDLHAMMER kuralları, varsayılan mum ayarlarıyla: formasyon varsa +100"""
+    o, h, l, c = df['Open'], df['High'], df['Low'], df['Close']
+    govde = (c - o).abs()
+    alt_govde = np.minimum(o, c)
+    govde_ort = govde.rolling(10).mean().shift(1)
+    aralik_ort = (h - l).rolling(10).mean().shift(1)
+    yakin_ort = (h - l).rolling(5).mean().shift(2)
+    formasyon = ((govde < govde_ort) & (alt_govde - l > govde)
+                 & (h - np.maximum(o, c) < 0.1 * aralik_ort)
+                 & (alt_govde <= l.shift(1) + 0.2 * yakin_ort))
+    deger = np.where(formasyon, 100.0, 0.0)
+    deger[:11] = 0.0
+    return pd.DataFrame({'CDL_HAMMER': deger}, index=df.index)
+
+
+def sentetik_cerceveler(adet=100, bar=250, tohum=42):
+    """Doğrulama ve benchmark için rastgele yürüyüş OHLCV çerçeveleri"""
+    rng = np.random.default_rng(tohum)
+    tarih = pd.bdate_range(end=pd.Timestamp.now().normalize(), periods=bar)
+    cerceveler = {}
+    for j in range(adet):
+        kapanis = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, bar)))
+        acilis = kapanis * (1 + rng.normal(0, 0.01, bar))
+        cerceveler[f"SENT{j:03d}"] = pd.DataFrame({
+            'Open': acilis,
+            'High': np.maximum(acilis, kapanis) * (1 + rng.uniform(0, 0.02, bar)),
+            'Low': np.minimum(acilis, kapanis) * (1 - rng.uniform(0, 0.02, bar)),
+            'Close': kapanis,
+            'Volume': rng.integers(100_000, 10_000_000, bar).astype(float),
+        }, index=tarih)
+    return cerceveler
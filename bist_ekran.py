@@ -0,0 +1,91 @@
+"""
+BIST100 PRO - ekran sorguları için filtre ifadesi derleyicisi.
+
+Kullanıcının yazdığı filtre ifadesi ("RSI < 30 and ADX > 25") Python sözdizimiyle
+çözümlenir ve beyaz listeden geçen düğümler parametreli bir SQL WHERE koşuluna çevrilir;
+sabitler metne gömülmez, bağlı parametre olarak döner. Koşul son_indikatorler tablosunda
+çalıştırılır.
+"""
+import ast
+import re
+
+# Gösterge paneli kolonu -> son_indikatorler kolonu
+GOSTERGE_KOLONLARI = {
+    "Hisse": "hisse", "Sektör": "sektor", "Kapanış": "fiyat", "Önceki Kapanış": "onceki_fiyat",
+    "RSI": "rsi", "MACD": "macd", "MACD Sinyal": "macd_sinyal", "SMA_50": "sma_50", "SMA_200": "sma_200",
+    "ADX": "adx", "ATR": "atr", "BB Alt": "bb_alt", "BB Orta": "bb_orta", "BB Üst": "bb_ust",
+    "Stoch K": "stoch_k", "Stoch D": "stoch_d", "OBV": "obv", "Hacim Oranı": "hacim_orani",
+    "Yutan": "yutan", "Çekiç": "cekic", "Skor": "skor", "Karar": "karar",
+}
+EKRAN_KOLONLARI = tuple(GOSTERGE_KOLONLARI.values()) + ("zaman",)
+EKRAN_TAKMA_ADLARI = {"price": "fiyat", "close": "fiyat", "kapanis": "fiyat", "kapanış": "fiyat",
+                      "sektör": "sektor", "score": "skor", "signal": "macd_sinyal", "macds": "macd_sinyal",
+                      "volume_ratio": "hacim_orani", "engulfing": "yutan", "hammer": "cekic", "çekiç": "cekic"}
+EKRAN_MAKS_UZUNLUK = 500
+HAZIR_EKRANLAR = {
+    "Aşırı satım + güçlü trend": "RSI < 30 and ADX > 25",
+    "SMA200 üstünde, MACD pozitif": "fiyat > SMA_200 and MACD > macd_sinyal and RSI < 70",
+    "Bollinger alt bandı altında": "fiyat < bb_alt",
+    "Hacim patlaması": "hacim_orani > 2 and fiyat > onceki_fiyat",
+    "Boğa formasyonu": "yutan = 100 or cekic = 100",
+    "Stokastik dipten dönüş": "stoch_k < 20 and stoch_k > stoch_d",
+}
+_SQL_KARSILASTIRMA = {ast.Lt: "<", ast.LtE: "<=", ast.Gt: ">", ast.GtE: ">=", ast.Eq: "=", ast.NotEq: "!="}
+_SQL_ISLEM = {ast.Add: "+", ast.Sub: "-", ast.Mult: "*", ast.Div: "/"}
+
+
+def ekran_sql(ifade):
+    """
+    Filtre ifadesini parametreli SQL WHERE koşuluna çevir -> (koşul, parametreler).
+    Yalnızca tablo kolonları, sayı/metin sabitleri, karşılaştırmalar, in, + - * /,
+    and/or/not (ve/veya/değil) ve parantez kabul edilir; diğer her şey ValueError.
+    Örnek: "RSI < 30 and ADX > 25 and fiyat > SMA_200"
+    """
+    if len(ifade) > EKRAN_MAKS_UZUNLUK:
+        raise ValueError(f"İfade en fazla {EKRAN_MAKS_UZUNLUK} karakter olabilir")
+    # Metin sabitlerinin dışında: ve/veya/değil ve tek '=' Python sözdizimine çevrilir
+    parcalar = re.split(r"""('[^']*'|"[^"]*")""", ifade)
+    for i in range(0, len(parcalar), 2):
+        parca = re.sub(r"(?i)\b(and|ve)\b", " and ", parcalar[i])
+        parca = re.sub(r"(?i)\b(or|veya)\b", " or ", parca)
+        parca = re.sub(r"(?i)\b(not|değil|DEĞİL)\b", " not ", parca)
+        parca = parca.replace("<>", "!=")
+        parcalar[i] = re.sub(r"(?<![<>!=])=(?!=)", "==", parca)
+    try:
+        agac = ast.parse("".join(parcalar).strip(), mode="eval").body
+    except SyntaxError:
+        raise ValueError("İfade çözümlenemedi")
+
+    parametreler = []
+    def cevir(dugum):
+        if isinstance(dugum, ast.BoolOp):
+            baglac = " AND " if isinstance(dugum.op, ast.And) else " OR "
+            return "(" + baglac.join(cevir(deger) for deger in dugum.values) + ")"
+        if isinstance(dugum, ast.UnaryOp) and isinstance(dugum.op, (ast.Not, ast.USub)):
+            return f"({'NOT ' if isinstance(dugum.op, ast.Not) else '-'}{cevir(dugum.operand)})"
+        if isinstance(dugum, ast.BinOp) and type(dugum.op) in _SQL_ISLEM:
+            return f"({cevir(dugum.left)} {_SQL_ISLEM[type(dugum.op)]} {cevir(dugum.right)})"
+        if isinstance(dugum, ast.Compare):
+            kosullar, sol = [], dugum.left
+            for op, sag in zip(dugum.ops, dugum.comparators):
+                if isinstance(op, (ast.In, ast.NotIn)) and isinstance(sag, (ast.Tuple, ast.List)):
+                    degerler = ", ".join(cevir(eleman) for eleman in sag.elts)
+                    kosullar.append(f"{cevir(sol)} {'NOT IN' if isinstance(op, ast.NotIn) else 'IN'} ({degerler})")
+                elif type(op) in _SQL_KARSILASTIRMA:
+                    kosullar.append(f"{cevir(sol)} {_SQL_KARSILASTIRMA[type(op)]} {cevir(sag)}")
+                else:
+                    raise ValueError(f"İzin verilmeyen karşılaştırma: {ast.unparse(dugum)}")
+                sol = sag
+            return "(" + " AND ".join(kosullar) + ")"
+        if isinstance(dugum, ast.Name):
+            kolon = EKRAN_TAKMA_ADLARI.get(dugum.id.lower(), dugum.id.lower())
+            if kolon not in EKRAN_KOLONLARI:
+                raise ValueError(f"Bilinmeyen kolon: {dugum.id}")
+            return kolon
+        if (isinstance(dugum, ast.Constant) and isinstance(dugum.value, (int, float, str))
+                and not isinstance(dugum.value, bool)):
+            parametreler.append(dugum.value)
+            return "?"
+        raise ValueError(f"İzin verilmeyen ifade: {ast.unparse(dugum)}")
+
+    return cevir(agac), parametreler
@@ -0,0 +1,61 @@
+"""
+BIST100 PRO - portföy riski için artımlı kovaryans.
+
+Getiri penceresinin toplam ve çapraz çarpım toplamları sembol kümesi başına saklanır;
+bir sonraki çağrıda yalnızca pencereye giren, çıkan ve değeri değişen barlar işlenir.
+Durum deposu parametre olarak verilir (uygulamada süreç geneli paylaşılır).
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+KOVARYANS_DURUM_LIMIT = 32  # sembol kümesi; en uzun süredir kullanılmayan düşer
+
+
+def kovaryans_durumu():
+    """Boş kovaryans durum deposu: sembol kümesi -> artımlı toplamlar (LRU)"""
+    return {'kilit': threading.Lock(), 'veri': OrderedDict()}
+
+
+def artimli_kovaryans(depo, getiriler):
+    """
+    Getiri panelinin kovaryans matrisi. Toplam ve çapraz çarpım toplamları saklanır;
+    önceki pencereye göre yeni barlar eklenir, düşen barlar çıkarılır, değeri değişen
+    barların (gün içinde güncellenen son bar gibi) eski hali çıkarılıp yenisi eklenir.
+    Değişen kısım pencereden büyükse toplamlar baştan kurulur. Durum depoda sembol
+    kümesiyle anahtarlanır; kolon kümesi değişince ayrı toplamlar kurulur.
+    """
+    anahtar = tuple(getiriler.columns)
+    with depo['kilit']:
+        durum = depo['veri'].get(anahtar)
+        if durum is not None:
+            eski_pencere = durum['pencere']
+            ortak = eski_pencere.index.intersection(getiriler.index)
+            eski_ortak = eski_pencere.loc[ortak].to_numpy()
+            yeni_ortak = getiriler.loc[ortak].to_numpy()
+            degisen = (eski_ortak != yeni_ortak).any(axis=1)
+            cikan = np.vstack([eski_pencere.loc[eski_pencere.index.difference(ortak)].to_numpy(),
+                               eski_ortak[degisen]])
+            giren = np.vstack([getiriler.loc[getiriler.index.difference(ortak)].to_numpy(),
+                               yeni_ortak[degisen]])
+            if len(cikan) + len(giren) > len(getiriler):
+                durum = None
+            else:
+                durum['n'] += len(giren) - len(cikan)
+                durum['toplam'] = durum['toplam'] + giren.sum(axis=0) - cikan.sum(axis=0)
+                durum['capraz'] = durum['capraz'] + giren.T @ giren - cikan.T @ cikan
+        if durum is None:
+            X = getiriler.to_numpy()
+            durum = {'n': len(X), 'toplam': X.sum(axis=0), 'capraz': X.T @ X}
+
+        durum['pencere'] = getiriler
+        depo['veri'][anahtar] = durum
+        depo['veri'].move_to_end(anahtar)
+        while len(depo['veri']) > KOVARYANS_DURUM_LIMIT:
+            depo['veri'].popitem(last=False)
+
+        n = durum['n']
+        ortalama = durum['toplam'] / n
+        capraz = durum['capraz']
+    return (capraz - n * np.outer(ortalama, ortalama)) / (n - 1)
@@ -0,0 +1,178 @@
+"""
+BIST100 PRO - veri kaynakları için tek uçuş (istek birleştirme) ve hedged istek.
+
+Aynı (sembol, periyot, aralık) için eşzamanlı çağrılar tek upstream çağrısını paylaşır.
+Kaynak çağrılarının gecikme ve başarı istatistikleri bir depoda tutulur; hedged istek
+birincil kaynağın p95 gecikmesi aşılınca sıradaki sağlıklı kaynağa paralel istek atar.
+Durum, depo ve iş parçacığı havuzu parametre olarak verilir: uygulama süreç geneli paylaşılan
+örneklerini, testler kendi örneklerini kullanır. Kaynaklar (ad, fonksiyon) çiftleridir,
+fonksiyon (symbol, period, interval) alıp (df, kaynak_adi) ya da (None, None) döndürür.
+"""
+import asyncio
+import threading
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+# --- TEK UÇUŞ (SINGLE-FLIGHT) ---
+TEK_UCUS_ZAMAN_ASIMI = 60  # sn; bekleyenler lider çağrıyı en fazla bu kadar bekler
+
+
+def ucus_durumu():
+    """Boş tek uçuş durumu: devam eden uçuşlar ve sayaçlar"""
+    return {'kilit': threading.Lock(), 'ucuslar': {},
+            'istatistik': {'istek': 0, 'upstream': 0, 'birlesen': 0, 'en_kalabalik': 0}}
+
+
+def tek_ucus(durum, anahtar, fonksiyon):
+    """
+    Aynı anahtarla eşzamanlı gelen çağrılardan yalnızca ilki (lider) fonksiyonu çalıştırır;
+    diğerleri onun bitmesini bekleyip aynı sonucu alır. Lider hata alırsa bekleyenlere
+    (None, None) döner, hata liderde yükselir.
+    """
+    istatistik = durum['istatistik']
+    with durum['kilit']:
+        istatistik['istek'] += 1
+        ucus = durum['ucuslar'].get(anahtar)
+        lider = ucus is None
+        if lider:
+            ucus = {'olay': threading.Event(), 'sonuc': (None, None), 'bekleyen': 0}
+            durum['ucuslar'][anahtar] = ucus
+            istatistik['upstream'] += 1
+        else:
+            ucus['bekleyen'] += 1
+            istatistik['birlesen'] += 1
+            istatistik['en_kalabalik'] = max(istatistik['en_kalabalik'], ucus['bekleyen'] + 1)
+
+    if not lider:
+        ucus['olay'].wait(TEK_UCUS_ZAMAN_ASIMI)
+        return ucus['sonuc']
+
+    try:
+        ucus['sonuc'] = fonksiyon()
+    finally:
+        with durum['kilit']:
+            durum['ucuslar'].pop(anahtar, None)
+        ucus['olay'].set()
+    return ucus['sonuc']
+
+
+# --- HEDGED VERİ ÇEKME ---
+HEDGE_VARSAYILAN_ESIK = 2.0  # sn; yeterli gözlem yokken
+HEDGE_MIN_ESIK = 0.05
+HEDGE_MIN_ORNEK = 20
+GECIKME_KOVALARI = (0, 0.1, 0.25, 0.5, 1, 2, 5, 10, float('inf'))
+
+
+def gecikme_deposu():
+    """Boş gecikme/hedge istatistik deposu"""
+    return {'kilit': threading.Lock(), 'kaynaklar': {},
+            'hedge': {'istek': 0, 'hedge': 0, 'kazanan': {}}}
+
+
+def kaynak_cagir(depo, ad, kaynak, symbol, period, interval):
+    """Kaynağı çağır; gecikme ve başarıyı depodaki histograma kaydet"""
+    t0 = time.perf_counter()
+    try:
+        df, source = kaynak(symbol, period, interval)
+    except Exception:
+        df, source = None, None
+    sure = time.perf_counter() - t0
+
+    with depo['kilit']:
+        kayit = depo['kaynaklar'].setdefault(ad, {'gecikme': deque(maxlen=500), 'basari': deque(maxlen=20)})
+        kayit['gecikme'].append(sure)
+        kayit['basari'].append(df is not None)
+    return df, source
+
+
+def hedge_esigi(depo, ad):
+    """Kaynağın gözlenen p95 gecikmesi; yeterli örnek yoksa varsayılan eşik"""
+    kayit = depo['kaynaklar'].get(ad)
+    if kayit is None or len(kayit['gecikme']) < HEDGE_MIN_ORNEK:
+        return HEDGE_VARSAYILAN_ESIK
+    return max(HEDGE_MIN_ESIK, float(np.percentile(kayit['gecikme'], 95)))
+
+
+def kaynak_saglikli(depo, ad):
+    """Son çağrıların en az %20'si başarılıysa (ya da az gözlem varsa) sağlıklı"""
+    kayit = depo['kaynaklar'].get(ad)
+    if kayit is None or len(kayit['basari']) < 5:
+        return True
+    return sum(kayit['basari']) / len(kayit['basari']) >= 0.2
+
+
+async def _hedged_fetch(depo, havuz, kaynaklar, symbol, period, interval):
+    """
+    Birincil kaynağa istek at; eşiği (p95) aşınca sıradaki sağlıklı kaynağa da
+    paralel istek gönder. İlk geçerli çerçeve kazanır, bekleyenler iptal edilir.
+    Başarısız yanıt sıradaki kaynağı hemen başlatır.
+    """
+    loop = asyncio.get_running_loop()
+    saglikli = [k for k in kaynaklar if kaynak_saglikli(depo, k[0])]
+    kalan = saglikli + [k for k in kaynaklar if k not in saglikli]
+    bekleyen = {}
+    istatistik = depo['hedge']
+
+    def say(alan, ad=None):
+        with depo['kilit']:
+            if ad is None:
+                istatistik[alan] += 1
+            else:
+                istatistik[alan][ad] = istatistik[alan].get(ad, 0) + 1
+
+    say('istek')
+
+    def baslat():
+        ad, kaynak = kalan.pop(0)
+        gorev = loop.run_in_executor(havuz, kaynak_cagir, depo, ad, kaynak, symbol, period, interval)
+        bekleyen[gorev] = ad
+        return ad
+
+    son_baslatilan = baslat()
+    try:
+        while bekleyen:
+            hedge_mumkun = bool(kalan) and kalan[0] in saglikli
+            zaman_asimi = hedge_esigi(depo, son_baslatilan) if hedge_mumkun else None
+            bitenler, _ = await asyncio.wait(bekleyen, timeout=zaman_asimi,
+                                             return_when=asyncio.FIRST_COMPLETED)
+            for gorev in bitenler:
+                ad = bekleyen.pop(gorev)
+                df, source = gorev.result()
+                if df is not None:
+                    say('kazanan', ad)
+                    return df, source
+            if kalan and (bitenler or hedge_mumkun):
+                if not bitenler:
+                    say('hedge')
+                son_baslatilan = baslat()
+        return None, None
+    finally:
+        for gorev in bekleyen:
+            gorev.cancel()
+
+
+def hedged_fetch(depo, havuz, kaynaklar, symbol, period="1y", interval="1d"):
+    """Hedged veri çekme (senkron giriş noktası); kaybeden istekler havuzda sonlanır"""
+    return asyncio.run(_hedged_fetch(depo, havuz, list(kaynaklar), symbol, period, interval))
+
+
+def gecikme_histogrami(depo):
+    """Kaynak başına gecikme kovası sayıları ve p50/p95"""
+    satirlar = []
+    for ad, kayit in list(depo['kaynaklar'].items()):
+        gecikmeler = np.array(kayit['gecikme'])
+        if len(gecikmeler) == 0:
+            continue
+        sayilar, _ = np.histogram(gecikmeler, bins=GECIKME_KOVALARI)
+        satir = {'Kaynak': ad, 'n': len(gecikmeler),
+                 'p50 (ms)': np.percentile(gecikmeler, 50) * 1000,
+                 'p95 (ms)': np.percentile(gecikmeler, 95) * 1000,
+                 'Eşik (ms)': hedge_esigi(depo, ad) * 1000,
+                 'Sağlıklı': kaynak_saglikli(depo, ad)}
+        for ust, sayi in zip(GECIKME_KOVALARI[1:], sayilar):
+            satir[f"≤{ust:g}s" if ust != float('inf') else ">10s"] = int(sayi)
+        satirlar.append(satir)
+    return pd.DataFrame(satirlar)
@@ -0,0 +1,117 @@
+"""
+bist_cekirdekler doğrulaması: çekirdekler pandas_ta ve TA-Lib referanslarıyla, mum
+formasyonlarının pandas yolu TA-Lib ile karşılaştırılır. Streamlit betiği çalıştırılmaz.
+
+    python -m pytest tests/
+"""
+import numpy as np
+import pytest
+
+import bist_cekirdekler as ck
+
+
+def _cerceveler():
+    """Farklı uzunlukta (sağa hizalı NaN dolgusu sınansın) ve açılış = önceki kapanış
+    eşitlikleri içeren (±80 yutan sinyalleri) sentetik çerceveler"""
+    cerceveler = {}
+    for j, (symbol, df) in enumerate(ck.sentetik_cerceveler(adet=6, bar=300, tohum=7).items()):
+        df = df.iloc[20 * j:].copy()
+        df.loc[df.index[5::7], 'Open'] = df['Close'].shift(1).iloc[5::7]
+        cerceveler[symbol] = df
+    return cerceveler
+
+
+CERCEVELER = _cerceveler()
+
+
+def toplu(kolon):
+    """Çerçeveleri (bar x hisse) diziye çevir; kısa geçmişlerin başı NaN"""
+    uzunluk = max(len(df) for df in CERCEVELER.values())
+    dizi = np.full((uzunluk, len(CERCEVELER)), np.nan)
+    for j, df in enumerate(CERCEVELER.values()):
+        dizi[uzunluk - len(df):, j] = df[kolon].to_numpy()
+    return dizi
+
+
+def karsilastir(cikti, referanslar, tolerans=1e-9):
+    """Çekirdek çıktısını hisse başına referans serileriyle (NaN konumları dahil) karşılaştır"""
+    for j, (df, referans) in enumerate(zip(CERCEVELER.values(), referanslar)):
+        beklenen = referans.reindex(df.index).to_numpy(dtype=np.float64)
+        np.testing.assert_allclose(cikti[len(cikti) - len(df):, j], beklenen,
+                                   rtol=tolerans, atol=tolerans, equal_nan=True)
+
+
+@pytest.fixture(scope="module")
+def pandas_ta():
+    return pytest.importorskip("pandas_ta")
+
+
+def test_rsi(pandas_ta):
+    karsilastir(ck.rsi(toplu('Close'), 14),
+                [df.ta.rsi(length=14, talib=False) for df in CERCEVELER.values()])
+
+
+def test_atr(pandas_ta):
+    karsilastir(ck.atr(toplu('High'), toplu('Low'), toplu('Close'), 14),
+                [df.ta.atr(length=14, talib=False) for df in CERCEVELER.values()])
+
+
+def test_adx(pandas_ta):
+    ciktilar = ck.adx(toplu('High'), toplu('Low'), toplu('Close'), 14)
+    referanslar = [df.ta.adx(length=14, talib=False) for df in CERCEVELER.values()]
+    for cikti, kolon in zip(ciktilar, ("ADX_14", "DMP_14", "DMN_14")):
+        karsilastir(cikti, [referans[kolon] for referans in referanslar])
+
+
+def test_macd(pandas_ta):
+    ciktilar = ck.macd(toplu('Close'), 12, 26, 9)
+    referanslar = [df.ta.macd(fast=12, slow=26, signal=9, talib=False) for df in CERCEVELER.values()]
+    for cikti, kolon in zip(ciktilar, ("MACD_12_26_9", "MACDh_12_26_9", "MACDs_12_26_9")):
+        karsilastir(cikti, [referans[kolon] for referans in referanslar])
+
+
+def test_macd_ortada_nan_boslugu(pandas_ta):
+    # ewm gibi NaN kapanış son değeri taşımalı; sonraki barlar NaN'a dönmemeli
+    df = next(iter(CERCEVELER.values())).copy()
+    df.loc[df.index[100:103], 'Close'] = np.nan
+    ciktilar = ck.macd(df[['Close']].to_numpy(), 12, 26, 9)
+    referans = df.ta.macd(fast=12, slow=26, signal=9, talib=False)
+    for cikti, kolon in zip(ciktilar, ("MACD_12_26_9", "MACDh_12_26_9", "MACDs_12_26_9")):
+        np.testing.assert_allclose(cikti[:, 0], referans[kolon].to_numpy(dtype=np.float64),
+                                   rtol=1e-9, atol=1e-9, equal_nan=True)
+        assert not np.isnan(cikti[103:, 0]).any()
+
+
+def test_stoch(pandas_ta):
+    ciktilar = ck.stoch(toplu('High'), toplu('Low'), toplu('Close'), 14, 3, 3)
+    referanslar = [df.ta.stoch(k=14, d=3, smooth_k=3, talib=False) for df in CERCEVELER.values()]
+    for cikti, kolon in zip(ciktilar, ("STOCHk_14_3_3", "STOCHd_14_3_3")):
+        karsilastir(cikti, [referans[kolon] for referans in referanslar])
+
+
+@pytest.mark.parametrize("cekirdek, formasyon, kolon", [
+    (ck.yutan, ck.yutan_formasyonu, "CDL_ENGULFING"),
+    (ck.cekic, ck.cekic_formasyonu, "CDL_HAMMER"),
+])
+def test_mum_formasyonu_pandas_yolu_ile_ayni(cekirdek, formasyon, kolon):
+    cikti = cekirdek(toplu('Open'), toplu('High'), toplu('Low'), toplu('Close'))
+    referanslar = [formasyon(df)[kolon] for df in CERCEVELER.values()]
+    karsilastir(cikti, referanslar, tolerans=0)
+    assert np.count_nonzero(np.nan_to_num(cikti)) > 0
+
+
+def test_yutan_esitlikte_80():
+    degerler = np.concatenate([ck.yutan_formasyonu(df)['CDL_ENGULFING'].to_numpy()
+                               for df in CERCEVELER.values()])
+    assert set(np.unique(np.abs(degerler))) == {0.0, 80.0, 100.0}
+
+
+@pytest.mark.parametrize("fonksiyon, formasyon, kolon", [
+    ("CDLENGULFING", ck.yutan_formasyonu, "CDL_ENGULFING"),
+    ("CDLHAMMER", ck.cekic_formasyonu, "CDL_HAMMER"),
+])
+def test_mum_formasyonu_talib_ile_ayni(fonksiyon, formasyon, kolon):
+    talib = pytest.importorskip("talib")
+    for df in CERCEVELER.values():
+        beklenen = getattr(talib, fonksiyon)(*(df[k].to_numpy() for k in ('Open', 'High', 'Low', 'Close')))
+        np.testing.assert_array_equal(formasyon(df)[kolon].to_numpy(), beklenen.astype(np.float64))
@@ -0,0 +1,105 @@
+"""
+bist_ekran doğrulaması: kabul edilen ifadelerin SQL karşılığı, reddedilen girdiler ve
+sabitlerin bağlı parametre olarak kalması; koşullar bellek içi SQLite tablosunda çalıştırılır.
+Streamlit betiği çalıştırılmaz.
+
+    python -m pytest tests/
+"""
+import sqlite3
+
+import pytest
+
+from bist_ekran import EKRAN_KOLONLARI, EKRAN_MAKS_UZUNLUK, HAZIR_EKRANLAR, ekran_sql
+
+
+@pytest.mark.parametrize("ifade, kosul, parametreler", [
+    ("RSI < 30 and ADX > 25", "((rsi < ?) AND (adx > ?))", [30, 25]),
+    ("RSI < 30 ve ADX > 25", "((rsi < ?) AND (adx > ?))", [30, 25]),
+    ("rsi < 30 veya not adx > 25", "((rsi < ?) OR (NOT (adx > ?)))", [30, 25]),
+    ("değil (rsi < 30)", "(NOT (rsi < ?))", [30]),
+    ("DEĞİL rsi < 30", "(NOT (rsi < ?))", [30]),
+    ("sektor in ('Banka', 'Holding')", "(sektor IN (?, ?))", ["Banka", "Holding"]),
+    ("fiyat not in (1, 2)", "(fiyat NOT IN (?, ?))", [1, 2]),
+    ("(fiyat - sma_200) / atr > 2 * 1.5", "(((fiyat - sma_200) / atr) > (? * ?))", [2, 1.5]),
+    ("-macd + 1 > 0", "(((-macd) + ?) > ?)", [1, 0]),
+    ("20 < rsi < 30", "(? < rsi AND rsi < ?)", [20, 30]),
+    ("yutan = 100", "(yutan = ?)", [100]),
+    ("price <> 5", "(fiyat != ?)", [5]),
+    ("close >= SMA_50 and score > 3", "((fiyat >= sma_50) AND (skor > ?))", [3]),
+    ("hisse = 've'", "(hisse = ?)", ["ve"]),
+])
+def test_kabul_edilen_ifadeler(ifade, kosul, parametreler):
+    assert ekran_sql(ifade) == (kosul, parametreler)
+
+
+@pytest.mark.parametrize("ifade", list(HAZIR_EKRANLAR.values()))
+def test_hazir_ekranlar_derlenir(ifade):
+    ekran_sql(ifade)
+
+
+@pytest.mark.parametrize("ifade, mesaj", [
+    ("len(hisse) > 3", "İzin verilmeyen ifade"),
+    ("__import__('os').system('x')", "İzin verilmeyen ifade"),
+    ("__import__ > 1", "Bilinmeyen kolon"),
+    ("rsi.real > 1", "İzin verilmeyen ifade"),
+    ("hisse.__class__ = 'x'", "İzin verilmeyen ifade"),
+    ("hisse[0] = 'A'", "İzin verilmeyen ifade"),
+    ("lambda: 1", "İzin verilmeyen ifade"),
+    ("rsi ** 2 > 1", "İzin verilmeyen ifade"),
+    ("rsi is None", "İzin verilmeyen karşılaştırma"),
+    ("True", "İzin verilmeyen ifade"),
+    ("foo > 1", "Bilinmeyen kolon"),
+    ("sqlite_master > 1", "Bilinmeyen kolon"),
+    ("rsi > 1; DROP TABLE son_indikatorler", "çözümlenemedi"),
+    ("rsi > 1 " + "and rsi > 1 " * 50, "en fazla"),
+])
+def test_reddedilen_girdiler(ifade, mesaj):
+    with pytest.raises(ValueError, match=mesaj):
+        ekran_sql(ifade)
+
+
+def test_uzunluk_siniri():
+    ifade = "rsi > 1"
+    ekran_sql(ifade + " " * (EKRAN_MAKS_UZUNLUK - len(ifade)))
+    with pytest.raises(ValueError):
+        ekran_sql(ifade + " " * (EKRAN_MAKS_UZUNLUK - len(ifade) + 1))
+
+
+@pytest.mark.parametrize("deger", [
+    "A' OR '1'='1",
+    "x'); DROP TABLE son_indikatorler; --",
+    "rsi or 1",
+])
+def test_sabitler_bagli_parametre(deger):
+    kosul, parametreler = ekran_sql(f'hisse = "{deger}"')
+    assert kosul == "(hisse = ?)" and parametreler == [deger]
+    assert "'" not in kosul and "--" not in kosul
+
+
+@pytest.fixture
+def tablo():
+    baglanti = sqlite3.connect(":memory:")
+    baglanti.execute(f"CREATE TABLE son_indikatorler ({', '.join(EKRAN_KOLONLARI)})")
+    satirlar = [{"hisse": "AKBNK.IS", "sektor": "Banka", "fiyat": 50.0, "rsi": 25.0, "adx": 30.0},
+                {"hisse": "THYAO.IS", "sektor": "Ulaştırma", "fiyat": 300.0, "rsi": 55.0, "adx": 20.0},
+                {"hisse": "A' OR '1'='1", "sektor": "Banka", "fiyat": 10.0, "rsi": 80.0, "adx": 10.0}]
+    for satir in satirlar:
+        baglanti.execute(f"INSERT INTO son_indikatorler ({', '.join(satir)}) "
+                         f"VALUES ({', '.join('?' * len(satir))})", tuple(satir.values()))
+    yield baglanti
+    baglanti.close()
+
+
+def calistir(baglanti, ifade):
+    kosul, parametreler = ekran_sql(ifade)
+    return [satir[0] for satir in baglanti.execute(
+        f"SELECT hisse FROM son_indikatorler WHERE {kosul} ORDER BY hisse", parametreler)]
+
+
+def test_sqlite_uzerinde_calisir(tablo):
+    assert calistir(tablo, "RSI < 30 ve ADX > 25") == ["AKBNK.IS"]
+    assert calistir(tablo, "sektor in ('Banka',) and not rsi > 70") == ["AKBNK.IS"]
+    assert calistir(tablo, "fiyat / 10 >= 5") == ["AKBNK.IS", "THYAO.IS"]
+    # Enjeksiyon denemesi tüm satırları değil, yalnızca birebir eşleşen hisseyi döndürür
+    assert calistir(tablo, "hisse = \"A' OR '1'='1\"") == ["A' OR '1'='1"]
+    assert calistir(tablo, "hisse = 'x'' OR 1=1 --'") == []
@@ -0,0 +1,81 @@
+"""
+bist_risk doğrulaması: artımlı kovaryans her adımda np.cov ile karşılaştırılır.
+Streamlit betiği çalıştırılmaz.
+
+    python -m pytest tests/
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+import bist_risk as risk
+
+RNG = np.random.default_rng(0)
+FIYATLAR = pd.DataFrame(100 * np.exp(np.cumsum(RNG.normal(0, 0.02, (600, 4)), axis=0)),
+                        index=pd.bdate_range("2024-01-01", periods=600), columns=list("ABCD"))
+
+
+def getiri(fiyatlar):
+    return fiyatlar.pct_change().iloc[1:].fillna(0)
+
+
+def kontrol(depo, getiriler):
+    """Artımlı sonucu np.cov ile karşılaştır; depodaki durumu döndür"""
+    np.testing.assert_allclose(risk.artimli_kovaryans(depo, getiriler), np.cov(getiriler.to_numpy().T),
+                               rtol=1e-9, atol=1e-12)
+    return depo['veri'][tuple(getiriler.columns)]
+
+
+@pytest.fixture
+def depo():
+    return risk.kovaryans_durumu()
+
+
+@pytest.mark.parametrize("kayma", [1, 10])
+def test_pencere_kaymasi(depo, kayma):
+    ilk = kontrol(depo, getiri(FIYATLAR.iloc[300:550]))
+    # Toplamlar baştan kurulmadan güncellenir
+    assert kontrol(depo, getiri(FIYATLAR.iloc[300 + kayma:550 + kayma])) is ilk
+
+
+def test_pencere_buyume_ve_kisalma(depo):
+    kontrol(depo, getiri(FIYATLAR.iloc[300:550]))
+    kontrol(depo, getiri(FIYATLAR.iloc[250:551]))
+    kontrol(depo, getiri(FIYATLAR.iloc[280:551]))
+
+
+def test_son_bar_revizyonu(depo):
+    pencere = FIYATLAR.iloc[300:550]
+    ilk = kontrol(depo, getiri(pencere))
+    for carpan in (1.03, 0.98):
+        revize = pencere.copy()
+        revize.iloc[-1] *= carpan
+        assert kontrol(depo, getiri(revize)) is ilk
+
+
+def test_ara_bar_revizyonu_ve_kayma(depo):
+    kontrol(depo, getiri(FIYATLAR.iloc[60:560]))
+    revize = FIYATLAR.iloc[61:561].copy()
+    revize.iloc[200] *= 1.1
+    kontrol(depo, getiri(revize))
+
+
+def test_kolon_kumesi_degisimi(depo):
+    pencere = FIYATLAR.iloc[300:550]
+    kontrol(depo, getiri(pencere[["A", "B", "C"]]))
+    kontrol(depo, getiri(pencere))
+    kontrol(depo, getiri(pencere[["A", "C"]]))
+    # Aynı sembol kümesi farklı pencereyle döndüğünde kendi toplamlarından devam eder
+    kontrol(depo, getiri(FIYATLAR.iloc[301:551][["A", "B", "C"]]))
+    assert set(depo['veri']) == {("A", "B", "C"), ("A", "B", "C", "D"), ("A", "C")}
+
+
+def test_tamamen_yeni_pencere_bastan_kurulur(depo):
+    ilk = kontrol(depo, getiri(FIYATLAR.iloc[0:100]))
+    assert kontrol(depo, getiri(FIYATLAR.iloc[300:400])) is not ilk
+
+
+def test_durum_sinirli(depo):
+    for i in range(risk.KOVARYANS_DURUM_LIMIT + 8):
+        risk.artimli_kovaryans(depo, getiri(FIYATLAR.iloc[:100]).add_suffix(f"_{i}"))
+    assert len(depo['veri']) == risk.KOVARYANS_DURUM_LIMIT
@@ -0,0 +1,137 @@
+"""
+bist_veri doğrulaması: tek uçuş eşzamanlı çağrılarla, hedged istek yerel gecikmeli
+kaynaklarla sınanır; her test kendi durumunu/deposunu ve havuzunu kurar.
+Streamlit betiği çalıştırılmaz.
+
+    python -m pytest tests/
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import bist_veri as veri
+
+CERCEVE = pd.DataFrame({'Close': np.ones(60)}, index=pd.bdate_range(end="2026-10-16", periods=60))
+
+
+def gecikmeli_kaynak(ad, gecikme, basarili=True):
+    """Yerel test kaynağı: gecikme kadar bekler, küçük sabit bir çerçeve döndürür"""
+    def kaynak(symbol, period, interval):
+        time.sleep(gecikme)
+        return (CERCEVE, ad) if basarili else (None, None)
+    return kaynak
+
+
+@pytest.fixture
+def havuz():
+    havuz = ThreadPoolExecutor(max_workers=4)
+    yield havuz
+    havuz.shutdown(wait=True)
+
+
+def test_tek_ucus_eszamanli_cagrilar_tek_upstream():
+    durum = veri.ucus_durumu()
+    cagrilar = []
+    baslangic = threading.Barrier(20)
+
+    def yavas_kaynak():
+        cagrilar.append(1)
+        time.sleep(0.3)
+        return CERCEVE, "test"
+
+    def cagir(_):
+        baslangic.wait()
+        return veri.tek_ucus(durum, ("TEST", "1y", "1d"), yavas_kaynak)
+
+    with ThreadPoolExecutor(max_workers=20) as istemciler:
+        sonuclar = list(istemciler.map(cagir, range(20)))
+    assert len(cagrilar) == 1
+    assert all(sonuc is sonuclar[0] for sonuc in sonuclar) and sonuclar[0][1] == "test"
+    assert durum['istatistik'] == {'istek': 20, 'upstream': 1, 'birlesen': 19, 'en_kalabalik': 20}
+    assert durum['ucuslar'] == {}
+
+
+def test_tek_ucus_lider_hata_alirsa_bekleyenler_bos_sonuc():
+    durum = veri.ucus_durumu()
+    anahtar = ("TEST", "1y", "1d")
+    basladi = threading.Event()
+
+    def hatali_kaynak():
+        basladi.set()
+        # Bekleyenler uçuşa katılana kadar bekle, sonra hata ver
+        sinir = time.monotonic() + 5
+        while durum['istatistik']['birlesen'] < 3 and time.monotonic() < sinir:
+            time.sleep(0.01)
+        raise ConnectionError("upstream")
+
+    with ThreadPoolExecutor(max_workers=4) as istemciler:
+        lider = istemciler.submit(veri.tek_ucus, durum, anahtar, hatali_kaynak)
+        assert basladi.wait(5)
+        bekleyenler = [istemciler.submit(veri.tek_ucus, durum, anahtar, hatali_kaynak) for _ in range(3)]
+        assert [b.result(timeout=5) for b in bekleyenler] == [(None, None)] * 3
+        with pytest.raises(ConnectionError):
+            lider.result(timeout=5)
+    assert durum['istatistik']['upstream'] == 1
+    assert durum['ucuslar'] == {}
+
+
+def test_esik_asilinca_yedek_kazanir(havuz):
+    depo = veri.gecikme_deposu()
+    for _ in range(veri.HEDGE_MIN_ORNEK):
+        veri.kaynak_cagir(depo, "birincil", gecikmeli_kaynak("birincil", 0), "TEST", "1y", "1d")
+    assert veri.hedge_esigi(depo, "birincil") == veri.HEDGE_MIN_ESIK
+
+    kaynaklar = [("birincil", gecikmeli_kaynak("birincil", 1.0)),
+                 ("yedek", gecikmeli_kaynak("yedek", 0.01))]
+    t0 = time.perf_counter()
+    df, source = veri.hedged_fetch(depo, havuz, kaynaklar, "TEST")
+    assert time.perf_counter() - t0 < 0.5
+    assert source == "yedek" and df is CERCEVE
+    assert depo['hedge'] == {'istek': 1, 'hedge': 1, 'kazanan': {'yedek': 1}}
+
+
+def test_basarisiz_birincil_yedegi_hemen_baslatir(havuz):
+    depo = veri.gecikme_deposu()
+    kaynaklar = [("birincil", gecikmeli_kaynak("birincil", 0, basarili=False)),
+                 ("yedek", gecikmeli_kaynak("yedek", 0.01))]
+    t0 = time.perf_counter()
+    df, source = veri.hedged_fetch(depo, havuz, kaynaklar, "TEST")
+    # Varsayılan eşik (2 sn) beklenmez
+    assert time.perf_counter() - t0 < veri.HEDGE_VARSAYILAN_ESIK / 4
+    assert source == "yedek"
+    assert depo['hedge'] == {'istek': 1, 'hedge': 0, 'kazanan': {'yedek': 1}}
+
+
+def test_hepsi_basarisizsa_bos_sonuc(havuz):
+    depo = veri.gecikme_deposu()
+    kaynaklar = [(ad, gecikmeli_kaynak(ad, 0, basarili=False)) for ad in ("birincil", "yedek")]
+    assert veri.hedged_fetch(depo, havuz, kaynaklar, "TEST") == (None, None)
+    assert depo['hedge']['kazanan'] == {}
+
+
+def test_istatistikler_verilen_depoya_yazilir(havuz):
+    depo, baska = veri.gecikme_deposu(), veri.gecikme_deposu()
+    kaynaklar = [("birincil", gecikmeli_kaynak("birincil", 0, basarili=False)),
+                 ("yedek", gecikmeli_kaynak("yedek", 0))]
+    veri.hedged_fetch(depo, havuz, kaynaklar, "TEST")
+    assert list(depo['kaynaklar']['birincil']['basari']) == [False]
+    assert list(depo['kaynaklar']['yedek']['basari']) == [True]
+    assert baska['kaynaklar'] == {} and baska['hedge']['istek'] == 0
+
+    histogram = veri.gecikme_histogrami(depo).set_index('Kaynak')
+    assert list(histogram['n']) == [1, 1]
+    assert histogram.loc['birincil', '≤0.1s'] == 1
+
+
+def test_sagliksiz_kaynak_sona_alinir(havuz):
+    depo = veri.gecikme_deposu()
+    for _ in range(5):
+        veri.kaynak_cagir(depo, "birincil", gecikmeli_kaynak("birincil", 0, basarili=False), "TEST", "1y", "1d")
+    assert not veri.kaynak_saglikli(depo, "birincil")
+
+    kaynaklar = [("birincil", gecikmeli_kaynak("birincil", 0)), ("yedek", gecikmeli_kaynak("yedek", 0))]
+    assert veri.hedged_fetch(depo, havuz, kaynaklar, "TEST")[1] == "yedek"